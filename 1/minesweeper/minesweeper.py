@@ -14,25 +14,41 @@ class Minesweeper():
         self.width = width
         self.mines = set()
 
-        # Initialize an empty field with no mines
-        self.board = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                row.append(False)
-            self.board.append(row)
+        # Initialize an empty field with no mines, stored row by row
+        # in a flat bytearray so that huge boards stay compact
+        self.board = bytearray(height * width)
 
         # Add mines randomly
-        while len(self.mines) != mines:
-            i = random.randrange(height)
-            j = random.randrange(width)
-            if not self.board[i][j]:
-                self.mines.add((i, j))
-                self.board[i][j] = True
+        for index in random.sample(range(height * width), mines):
+            self.board[index] = 1
+            self.mines.add(divmod(index, width))
+
+        # Precompute the number of nearby mines for every cell
+        self.counts = self.neighbor_counts()
+
+        # Zero-count regions are labelled lazily by `reveal`
+        self.labels = None
+        self.regions = None
 
         # At first, player has found no mines
         self.mines_found = set()
 
+    def neighbor_counts(self):
+        """
+        Returns a bytearray holding, for every cell on the board,
+        the number of mines within one row and column of it.
+        Equivalent to convolving the mine field with a 3x3 kernel,
+        but only touches the neighbours of each mine.
+        """
+        counts = bytearray(self.height * self.width)
+        for i, j in self.mines:
+            for k in range(max(i - 1, 0), min(i + 2, self.height)):
+                row = k * self.width
+                for l in range(max(j - 1, 0), min(j + 2, self.width)):
+                    if (k, l) != (i, j):
+                        counts[row + l] += 1
+        return counts
+
     def print(self):
         """
         Prints a text-based representation
@@ -41,7 +57,7 @@ class Minesweeper():
         for i in range(self.height):
             print("--" * self.width + "-")
             for j in range(self.width):
-                if self.board[i][j]:
+                if self.board[i * self.width + j]:
                     print("|X", end="")
                 else:
                     print("| ", end="")
@@ -50,7 +66,7 @@ class Minesweeper():
 
     def is_mine(self, cell):
         i, j = cell
-        return self.board[i][j]
+        return bool(self.board[i * self.width + j])
 
     def nearby_mines(self, cell):
         """
@@ -58,24 +74,60 @@ class Minesweeper():
         within one row and column of a given cell,
         not including the cell itself.
         """
+        i, j = cell
+        return self.counts[i * self.width + j]
 
-        # Keep count of nearby mines
-        count = 0
-
-        # Loop over all cells within one row and column
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
-
-                # Ignore the cell itself
-                if (i, j) == cell:
-                    continue
-
-                # Update count if cell in bounds and is mine
-                if 0 <= i < self.height and 0 <= j < self.width:
-                    if self.board[i][j]:
-                        count += 1
-
-        return count
+    def label_zero_regions(self):
+        """
+        Labels every connected region of safe cells with no nearby mines.
+        Returns a list holding the region label of each cell (-1 for cells
+        outside any zero region), and a list with, for each label, the
+        flat indices of the region's cells and the numbered cells around it.
+        """
+        labels = [-1] * (self.height * self.width)
+        regions = []
+        for start in range(self.height * self.width):
+            if labels[start] != -1 or self.counts[start] or self.board[start]:
+                continue
+
+            # Flood fill the region containing `start`
+            label = len(regions)
+            labels[start] = label
+            region = {start}
+            frontier = [start]
+            while frontier:
+                i, j = divmod(frontier.pop(), self.width)
+                for k in range(max(i - 1, 0), min(i + 2, self.height)):
+                    for l in range(max(j - 1, 0), min(j + 2, self.width)):
+                        neighbor = k * self.width + l
+                        region.add(neighbor)
+                        if labels[neighbor] == -1 and not self.counts[neighbor]:
+                            labels[neighbor] = label
+                            frontier.append(neighbor)
+            regions.append(region)
+        return labels, regions
+
+    def reveal(self, cell):
+        """
+        Returns the set of cells uncovered by clicking on `cell`.
+        Clicking a cell with no nearby mines uncovers its whole zero
+        region along with the numbered cells bordering it. Regions are
+        labelled once, so later reveals are constant-time lookups.
+        """
+        i, j = cell
+        index = i * self.width + j
+        if self.board[index] or self.counts[index]:
+            return frozenset([cell])
+
+        if self.labels is None:
+            self.labels, self.regions = self.label_zero_regions()
+        region = self.regions[self.labels[index]]
+
+        # Convert flat indices to cells the first time a region is revealed
+        if not isinstance(region, frozenset):
+            region = frozenset(divmod(k, self.width) for k in region)
+            self.regions[self.labels[index]] = region
+        return region
 
     def won(self):
         """
@@ -0,0 +1,87 @@
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from heredity import GENES, METHODS, load_data
+
+
+def main():
+
+    # Check for proper usage
+    if len(sys.argv) not in [3, 4, 5]:
+        sys.exit("Usage: python batch.py directory output.csv|output.jsonl [method] [workers]")
+    directory = sys.argv[1]
+    output = sys.argv[2]
+    method = sys.argv[3] if len(sys.argv) >= 4 else "junction"
+    workers = int(sys.argv[4]) if len(sys.argv) == 5 else None
+    if method not in METHODS:
+        sys.exit(f"Unknown method: {method} (choose from {', '.join(METHODS)})")
+
+    start = time.perf_counter()
+    families = batch(directory, output, method, workers)
+    elapsed = time.perf_counter() - start
+    print(f"Processed {families} families in {elapsed:.2f}s")
+
+
+def solve(filename, method):
+    """
+    Return the gene and trait distributions for the family in `filename`.
+    """
+    return filename, METHODS[method](load_data(filename))
+
+
+def batch(directory, output, method="junction", workers=None):
+    """
+    Compute gene and trait distributions for every family CSV in
+    `directory` on a pool of `workers` processes, writing one row per
+    person to `output`. The output is JSON Lines if `output` ends with
+    ".jsonl", and CSV otherwise.
+
+    Return the number of families processed.
+    """
+    filenames = sorted(
+        os.path.join(directory, filename)
+        for filename in os.listdir(directory)
+        if filename.endswith(".csv")
+    )
+    workers = workers or os.cpu_count()
+
+    with open(output, "w", newline="") as f, ProcessPoolExecutor(workers) as executor:
+        jsonl = output.endswith(".jsonl")
+        if not jsonl:
+            writer = csv.writer(f)
+            writer.writerow(
+                ["family", "name"] +
+                [f"gene_{gene}" for gene in GENES] +
+                ["trait_true", "trait_false"]
+            )
+
+        results = executor.map(
+            solve, filenames, [method] * len(filenames),
+            chunksize=max(1, len(filenames) // (workers * 4))
+        )
+        for filename, probabilities in results:
+            family = os.path.basename(filename)
+            for person, distributions in probabilities.items():
+                if jsonl:
+                    f.write(json.dumps({
+                        "family": family,
+                        "name": person,
+                        "gene": distributions["gene"],
+                        "trait": distributions["trait"]
+                    }) + "\n")
+                else:
+                    writer.writerow(
+                        [family, person] +
+                        [distributions["gene"][gene] for gene in GENES] +
+                        [distributions["trait"][True], distributions["trait"][False]]
+                    )
+
+    return len(filenames)
+
+
+if __name__ == "__main__":
+    main()
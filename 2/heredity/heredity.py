@@ -1,6 +1,11 @@
 import csv
+import heapq
 import itertools
+import math
+import random
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 
 PROBS = {
 
@@ -36,16 +41,63 @@ PROBS = {
     "mutation": 0.01
 }
 
+# Default sample budget, number of parallel chains and Gibbs burn-in
+# sweeps for the approximate samplers
+SAMPLES = 100000
+CHAINS = 8
+BURN_IN = 1000
+
+# Partial assignments less likely than this fraction of the best complete
+# assignment found so far are skipped by the pruned enumeration, making it
+# approximate; 0 keeps it exact
+PRUNE_THRESHOLD = 1e-9
+
 
 def main():
 
     # Check for proper usage
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python heredity.py data.csv")
+    if len(sys.argv) not in [2, 3, 4]:
+        sys.exit("Usage: python heredity.py data.csv [method] [samples|threshold]")
+    method = sys.argv[2] if len(sys.argv) >= 3 else "enumerate"
+    if method not in METHODS and method not in SAMPLERS:
+        methods = ", ".join(list(METHODS) + list(SAMPLERS))
+        sys.exit(f"Unknown method: {method} (choose from {methods})")
     people = load_data(sys.argv[1])
 
-    # Keep track of gene and trait probabilities for each person
-    probabilities = {
+    # Compute gene and trait probabilities for each person
+    intervals = None
+    if method in SAMPLERS:
+        samples = int(sys.argv[3]) if len(sys.argv) == 4 else SAMPLES
+        if samples < 1:
+            sys.exit("Number of samples must be positive")
+        probabilities, intervals, rate = sample_probabilities(people, method, samples)
+        print(f"{samples} samples, {rate:,.0f} samples/sec")
+    elif method == "pruned":
+        threshold = float(sys.argv[3]) if len(sys.argv) == 4 else PRUNE_THRESHOLD
+        if not 0 <= threshold < 1:
+            sys.exit("Pruning threshold must be at least 0 and below 1")
+        probabilities = pruned_probabilities(people, threshold)
+    else:
+        probabilities = METHODS[method](people)
+
+    # Print results, with 95% confidence intervals for sampled estimates
+    for person in people:
+        print(f"{person}:")
+        for field in probabilities[person]:
+            print(f"  {field.capitalize()}:")
+            for value in probabilities[person][field]:
+                p = probabilities[person][field][value]
+                if intervals is None:
+                    print(f"    {value}: {p:.4f}")
+                else:
+                    print(f"    {value}: {p:.4f} ± {intervals[person][field][value]:.4f}")
+
+
+def empty_probabilities(people):
+    """
+    Return a gene and trait distribution of zeros for each person.
+    """
+    return {
         person: {
             "gene": {
                 2: 0,
@@ -60,6 +112,18 @@ def main():
         for person in people
     }
 
+
+def enumerate_probabilities(people):
+    """
+    Compute each person's gene and trait distributions by summing the
+    joint probability of every assignment consistent with the evidence.
+    """
+
+    # Keep track of gene and trait probabilities for each person, scaled
+    # by exp(-shift) where `shift` is the largest log probability so far
+    probabilities = empty_probabilities(people)
+    shift = -math.inf
+
     # Loop over all sets of people who might have the trait
     names = set(people)
     for have_trait in powerset(names):
@@ -78,20 +142,15 @@ def main():
             for two_genes in powerset(names - one_gene):
 
                 # Update probabilities with new joint probability
-                p = joint_probability(people, one_gene, two_genes, have_trait)
-                update(probabilities, one_gene, two_genes, have_trait, p)
+                p = log_joint_probability(people, one_gene, two_genes, have_trait)
+                if p > shift:
+                    rescale(probabilities, math.exp(shift - p))
+                    shift = p
+                update(probabilities, one_gene, two_genes, have_trait, math.exp(p - shift))
 
     # Ensure probabilities sum to 1
     normalize(probabilities)
-
-    # Print results
-    for person in people:
-        print(f"{person}:")
-        for field in probabilities[person]:
-            print(f"  {field.capitalize()}:")
-            for value in probabilities[person][field]:
-                p = probabilities[person][field][value]
-                print(f"    {value}: {p:.4f}")
+    return probabilities
 
 
 def load_data(filename):
@@ -161,45 +220,35 @@ def joint_probability(people, one_gene, two_genes, have_trait):
         * everyone in set `have_trait` has the trait, and
         * everyone not in set` have_trait` does not have the trait.
     """
+    return math.exp(log_joint_probability(people, one_gene, two_genes, have_trait))
+
+
+def log_joint_probability(people, one_gene, two_genes, have_trait):
+    """
+    Compute the natural log of the joint probability computed by
+    `joint_probability`, summing log terms without any rounding so that
+    large families do not underflow. Impossible assignments give -inf.
+    """
     stats = getStats(people, one_gene, two_genes, have_trait)
+    logProb = 0
     for person in people:
         mother = people[person]['mother']
         father = people[person]['father']
+        gene = stats[person]['gene']
+        trait = stats[person]['trait']
 
         if mother == None:
-            gene = stats[person]['gene']
-            trait = stats[person]['trait']
-            stats[person]['prob'] = round((PROBS["gene"][gene] * PROBS["trait"][gene][trait]), 4)
+            prob = PROBS["gene"][gene] * PROBS["trait"][gene][trait]
         else:
             mGenes = stats[mother]['gene']
             fGenes = stats[father]['gene']
-            mTraitProb = 0.01
-            fTraitProb = 0.01
-            if mGenes == 1:
-                mTraitProb = 0.50
-            elif mGenes == 2:
-                mTraitProb = 0.99
-            if fGenes == 1:
-                fTraitProb = 0.50
-            elif fGenes == 2:
-                fTraitProb = 0.99
-
-            pGene = stats[person]['gene']
-            trait = stats[person]['trait']
-            if pGene == 0:
-                prob = round(((1 - mTraitProb) * (1 - fTraitProb)), 6)
-            elif pGene == 1:
-                prob = round((mTraitProb * (1 - fTraitProb)) + (fTraitProb * (1 - mTraitProb)), 6)
-            else:
-                prob = round((mTraitProb * fTraitProb), 6)
+            prob = INHERITANCE[mGenes][fGenes][gene] * PROBS["trait"][gene][trait]
+
+        if prob == 0:
+            return -math.inf
+        logProb += math.log(prob)
 
-            stats[person]['prob'] = round((prob * PROBS["trait"][pGene][trait]), 6)
-            
-    finalProb = 1
-    for i in stats:
-        finalProb *= stats[i]['prob']
-    
-    return round(finalProb, 8)
+    return logProb
 
 
 def update(probabilities, one_gene, two_genes, have_trait, p):
@@ -224,14 +273,605 @@ def normalize(probabilities):
     is normalized (i.e., sums to 1, with relative proportions the same).
     """
     for person in probabilities:
-        gTotal = probabilities[person]['gene'][0] + probabilities[person]['gene'][1] + probabilities[person]['gene'][2]
-        tTotal = probabilities[person]['trait'][True] + probabilities[person]['trait'][False]
-
-        probabilities[person]['gene'][0] = round(probabilities[person]['gene'][0] / gTotal, 4)
-        probabilities[person]['gene'][1] = round(probabilities[person]['gene'][1] / gTotal, 4)
-        probabilities[person]['gene'][2] = round(probabilities[person]['gene'][2] / gTotal, 4)
-        probabilities[person]['trait'][True] = round(probabilities[person]['trait'][True] / tTotal, 4)
-        probabilities[person]['trait'][False] = round(probabilities[person]['trait'][False] / tTotal, 4)
+        for field in ['gene', 'trait']:
+            total = sum(probabilities[person][field].values())
+            if total == 0:
+                continue
+            for value in probabilities[person][field]:
+                probabilities[person][field][value] /= total
+
+
+def pruned_probabilities(people, threshold=PRUNE_THRESHOLD):
+    """
+    Compute each person's gene and trait distributions by enumerating
+    gene assignments person by person, parents before children.
+
+    Known traits are fixed and unknown traits are summed out exactly, so
+    only gene counts are branched on. A partial assignment is abandoned
+    once its probability is below `threshold` times the most probable
+    complete assignment found so far; since later factors are at most 1,
+    it could only lead to assignments at least that unlikely. The result
+    is then approximate. A `threshold` of 0 keeps it exact, but prunes
+    nothing under PROBS: with a nonzero mutation rate no gene count is
+    impossible, so the zero-probability test never fires.
+    """
+    order = topological_order(people)
+    limit = math.log(threshold) if threshold > 0 else -math.inf
+    genes = dict()
+
+    # Probabilities are scaled by exp(-shift) as in `enumerate_probabilities`
+    probabilities = empty_probabilities(people)
+    shift = -math.inf
+
+    def factors(person):
+        mother = people[person]["mother"]
+        trait = people[person]["trait"]
+        for gene in GENES:
+            if mother is None:
+                p = PROBS["gene"][gene]
+            else:
+                p = INHERITANCE[genes[mother]][genes[people[person]["father"]]][gene]
+            if trait is not None:
+                p *= PROBS["trait"][gene][trait]
+            yield gene, p
+
+    def visit(k, logp):
+        nonlocal shift
+
+        # Add a complete assignment to everyone's distributions
+        if k == len(order):
+            if logp > shift:
+                rescale(probabilities, math.exp(shift - logp))
+                shift = logp
+            p = math.exp(logp - shift)
+            for person in order:
+                gene = genes[person]
+                probabilities[person]["gene"][gene] += p
+                if people[person]["trait"] is None:
+                    for trait in [True, False]:
+                        probabilities[person]["trait"][trait] += p * PROBS["trait"][gene][trait]
+            return
+
+        # Try the most likely gene counts first so pruning starts early
+        person = order[k]
+        for gene, p in sorted(factors(person), key=lambda factor: -factor[1]):
+            if p == 0 or logp + math.log(p) < shift + limit:
+                continue
+            genes[person] = gene
+            visit(k + 1, logp + math.log(p))
+
+    visit(0, 0)
+    normalize(probabilities)
+    for person in people:
+        if people[person]["trait"] is not None:
+            set_trait(probabilities, people, person)
+    return probabilities
+
+
+def rescale(probabilities, factor):
+    """
+    Multiply every probability in `probabilities` by `factor`.
+    """
+    for person in probabilities:
+        for field in ['gene', 'trait']:
+            for value in probabilities[person][field]:
+                probabilities[person][field][value] *= factor
+
+
+def vectorized_probabilities(people):
+    """
+    Compute each person's gene and trait distributions by enumerating
+    every gene and trait assignment at once as rows of NumPy arrays,
+    looking joint probabilities up in arrays built from `PROBS`.
+    """
+    import numpy as np
+
+    names = list(people)
+    index = dict((person, i) for i, person in enumerate(names))
+    unknown = [person for person in names if people[person]["trait"] is None]
+
+    # Row r of `genes` holds everyone's gene count in assignment r, and
+    # row s of `traits` holds the traits of the people not yet known
+    genes = (np.arange(3 ** len(names))[:, None] // 3 ** np.arange(len(names))) % 3
+    traits = (np.arange(2 ** len(unknown))[:, None] >> np.arange(len(unknown))) & 1
+
+    # Probability lookup tables, indexed by gene counts and trait (0 or 1)
+    prior = np.array([PROBS["gene"][gene] for gene in GENES])
+    inherit = np.array([
+        [[INHERITANCE[m][f][gene] for gene in GENES] for f in GENES]
+        for m in GENES
+    ])
+    trait_given_gene = np.array([
+        [PROBS["trait"][gene][False], PROBS["trait"][gene][True]]
+        for gene in GENES
+    ])
+
+    # Probability of each gene assignment, with known traits as evidence
+    p_genes = np.ones(len(genes))
+    for person in names:
+        i = index[person]
+        mother = people[person]["mother"]
+        father = people[person]["father"]
+        if mother is None:
+            p_genes *= prior[genes[:, i]]
+        else:
+            p_genes *= inherit[genes[:, index[mother]], genes[:, index[father]], genes[:, i]]
+        if people[person]["trait"] is not None:
+            p_genes *= trait_given_gene[genes[:, i], int(people[person]["trait"])]
+
+    # Joint probability of every combination of gene and unknown trait rows
+    joint = np.repeat(p_genes[:, None], len(traits), axis=1)
+    for k, person in enumerate(unknown):
+        joint *= trait_given_gene[genes[:, index[person]]][:, traits[:, k]]
+
+    by_genes = joint.sum(axis=1)
+    by_traits = joint.sum(axis=0)
+    total = by_genes.sum()
+
+    probabilities = empty_probabilities(people)
+    for person in names:
+        marginal = np.zeros(3)
+        np.add.at(marginal, genes[:, index[person]], by_genes)
+        for gene in GENES:
+            probabilities[person]["gene"][gene] = marginal[gene] / total
+    for k, person in enumerate(unknown):
+        marginal = np.zeros(2)
+        np.add.at(marginal, traits[:, k], by_traits)
+        probabilities[person]["trait"][True] = marginal[1] / total
+        probabilities[person]["trait"][False] = marginal[0] / total
+    for person in names:
+        if people[person]["trait"] is not None:
+            set_trait(probabilities, people, person)
+
+    return probabilities
+
+
+def inheritance_table():
+    """
+    Return `table` where `table[mother][father][child]` is the probability
+    that a child has `child` copies of the gene given that their parents
+    have `mother` and `father` copies.
+    """
+    mutation = PROBS["mutation"]
+    passes = {0: mutation, 1: 0.5, 2: 1 - mutation}
+    return {
+        mother: {
+            father: {
+                0: (1 - passes[mother]) * (1 - passes[father]),
+                1: (passes[mother] * (1 - passes[father]) +
+                    passes[father] * (1 - passes[mother])),
+                2: passes[mother] * passes[father]
+            }
+            for father in GENES
+        }
+        for mother in GENES
+    }
+
+
+def gene_factors(people):
+    """
+    Return the factors of the joint distribution over everyone's gene
+    count, with known traits folded in as evidence. Each factor is a pair
+    of a tuple of people and a dictionary mapping each tuple of their gene
+    counts to a probability.
+    """
+    factors = []
+    for person in people:
+        mother = people[person]["mother"]
+        father = people[person]["father"]
+        trait = people[person]["trait"]
+
+        def evidence(gene):
+            return 1 if trait is None else PROBS["trait"][gene][trait]
+
+        if mother is None:
+            factors.append(((person,), {
+                (gene,): PROBS["gene"][gene] * evidence(gene)
+                for gene in GENES
+            }))
+        else:
+            factors.append(((person, mother, father), {
+                (gene, m, f): INHERITANCE[m][f][gene] * evidence(gene)
+                for gene, m, f in itertools.product(GENES, repeat=3)
+            }))
+    return factors
+
+
+def sum_product(factors, keep):
+    """
+    Multiply `factors` together and sum out every variable not in `keep`,
+    returning a factor over `keep` scaled to sum to 1.
+    """
+    variables = list(dict.fromkeys(
+        itertools.chain.from_iterable(scope for scope, _ in factors)
+    ))
+    keep = tuple(keep)
+    position = dict((variable, i) for i, variable in enumerate(variables))
+    positions = [
+        [position[variable] for variable in scope] for scope, _ in factors
+    ]
+    kept = [position[variable] for variable in keep]
+
+    table = dict((values, 0) for values in itertools.product(GENES, repeat=len(keep)))
+    for values in itertools.product(GENES, repeat=len(variables)):
+        p = 1
+        for (_, factor), indices in zip(factors, positions):
+            p *= factor[tuple(values[i] for i in indices)]
+            if p == 0:
+                break
+        table[tuple(values[i] for i in kept)] += p
+
+    # Rescale to avoid underflow in large families
+    total = sum(table.values())
+    if total > 0:
+        for values in table:
+            table[values] /= total
+    return keep, table
+
+
+def junction_tree(people, factors):
+    """
+    Build a junction tree for `factors` by variable elimination, using a
+    greedy minimum-degree elimination order over everyone in `people`.
+
+    Return the cliques in elimination order, where the last clique is the
+    root, the index of each clique's parent (None for the root), each
+    clique's separator with its parent, the clique created when each
+    person was eliminated, and the factors assigned to each clique.
+    """
+    neighbors = dict((person, set()) for person in people)
+    for scope, _ in factors:
+        for a, b in itertools.permutations(scope, 2):
+            neighbors[a].add(b)
+
+    # Eliminate people one at a time, recording the clique each one forms.
+    # The heap holds `(degree, person)` entries, with a new entry pushed
+    # whenever a degree changes; entries that no longer match are skipped.
+    order = []
+    cliques = []
+    heap = [(len(neighbors[person]), person) for person in people]
+    heapq.heapify(heap)
+    eliminated = set()
+    while heap:
+        degree, person = heapq.heappop(heap)
+        if person in eliminated or degree != len(neighbors[person]):
+            continue
+        order.append(person)
+        eliminated.add(person)
+        cliques.append((person,) + tuple(sorted(neighbors[person])))
+        for a, b in itertools.permutations(neighbors[person], 2):
+            neighbors[a].add(b)
+        for other in neighbors[person]:
+            neighbors[other].discard(person)
+            heapq.heappush(heap, (len(neighbors[other]), other))
+
+    # Each clique hangs off the clique of the next of its people eliminated
+    eliminated = dict((person, i) for i, person in enumerate(order))
+    parents = []
+    separators = []
+    for clique in cliques:
+        separator = clique[1:]
+        separators.append(separator)
+        parents.append(
+            min(eliminated[person] for person in separator)
+            if separator else None
+        )
+
+    # Assign each factor to the clique of the first of its people eliminated
+    assigned = [[] for _ in cliques]
+    for factor in factors:
+        assigned[min(eliminated[person] for person in factor[0])].append(factor)
+
+    return cliques, parents, separators, eliminated, assigned
+
+
+def junction_tree_probabilities(people):
+    """
+    Compute each person's gene and trait distributions exactly by belief
+    propagation on a junction tree of the family. For families whose
+    pedigree is a tree, the cliques stay small and the running time grows
+    roughly linearly with the number of people.
+    """
+    factors = gene_factors(people)
+    cliques, parents, separators, eliminated, assigned = junction_tree(people, factors)
+    children = [[] for _ in cliques]
+    for i, parent in enumerate(parents):
+        if parent is not None:
+            children[parent].append(i)
+
+    # Pass messages up from the leaves to the roots
+    upward = [None] * len(cliques)
+    for i in range(len(cliques)):
+        if parents[i] is not None:
+            upward[i] = sum_product(
+                assigned[i] + [upward[child] for child in children[i]] +
+                [((person,), UNIFORM) for person in cliques[i]],
+                separators[i]
+            )
+
+    # Then pass messages back down from the roots to the leaves
+    downward = [None] * len(cliques)
+    for i in reversed(range(len(cliques))):
+        for child in children[i]:
+            incoming = [upward[other] for other in children[i] if other != child]
+            if downward[i] is not None:
+                incoming.append(downward[i])
+            downward[child] = sum_product(
+                assigned[i] + incoming + [((person,), UNIFORM) for person in cliques[i]],
+                separators[child]
+            )
+
+    # Read off each person's marginal from the clique that eliminated them
+    probabilities = empty_probabilities(people)
+    for person in people:
+        i = eliminated[person]
+        incoming = [upward[child] for child in children[i]]
+        if downward[i] is not None:
+            incoming.append(downward[i])
+        _, table = sum_product(
+            assigned[i] + incoming + [((p,), UNIFORM) for p in cliques[i]],
+            (person,)
+        )
+        for gene in GENES:
+            probabilities[person]["gene"][gene] = table[gene,]
+        set_trait(probabilities, people, person)
+
+    return probabilities
+
+
+def set_trait(probabilities, people, person):
+    """
+    Fill in `person`'s trait distribution from their gene distribution,
+    or from the evidence if their trait is known.
+    """
+    trait = people[person]["trait"]
+    for value in [True, False]:
+        if trait is not None:
+            probabilities[person]["trait"][value] = 1 if value == trait else 0
+        else:
+            probabilities[person]["trait"][value] = sum(
+                probabilities[person]["gene"][gene] * PROBS["trait"][gene][value]
+                for gene in GENES
+            )
+
+
+def topological_order(people):
+    """
+    Return the people in an order where everyone comes after their parents.
+    """
+    order = []
+    placed = set()
+
+    def place(person):
+        if person in placed:
+            return
+        for parent in [people[person]["mother"], people[person]["father"]]:
+            if parent is not None:
+                place(parent)
+        placed.add(person)
+        order.append(person)
+
+    for person in people:
+        place(person)
+    return order
+
+
+def draw(rng, distribution):
+    """
+    Return a gene count drawn from `distribution`, a sequence of the
+    probabilities of 0, 1 and 2 copies that need not sum to 1.
+    """
+    r = rng.random() * (distribution[0] + distribution[1] + distribution[2])
+    if r < distribution[0]:
+        return 0
+    if r < distribution[0] + distribution[1]:
+        return 1
+    return 2
+
+
+def likelihood_weighting(people, samples, seed):
+    """
+    Estimate gene and trait distributions by likelihood weighting: draw
+    everyone's genes from parents to children, and weight each sample by
+    the probability of the known traits.
+
+    Weights are kept in log space and accumulated relative to the largest
+    seen so far, as `enumerate_probabilities` does, so that large families
+    do not underflow. Return each person's weighted gene counts and
+    expected trait weight and the total weight of all samples, all scaled
+    by exp(-shift), along with `shift`.
+    """
+    rng = random.Random(seed)
+    order = topological_order(people)
+    prior = [PROBS["gene"][gene] for gene in GENES]
+    has_trait = [PROBS["trait"][gene][True] for gene in GENES]
+    evidence = dict(
+        (person, [
+            math.log(p) if p > 0 else -math.inf
+            for p in (PROBS["trait"][gene][people[person]["trait"]] for gene in GENES)
+        ])
+        for person in order if people[person]["trait"] is not None
+    )
+
+    gene_weights = dict((person, [0, 0, 0]) for person in order)
+    trait_weights = dict((person, 0) for person in order)
+    total = 0
+    shift = -math.inf
+    genes = dict()
+    for _ in range(samples):
+        log_weight = 0
+        for person in order:
+            mother = people[person]["mother"]
+            if mother is None:
+                gene = draw(rng, prior)
+            else:
+                gene = draw(rng, INHERITANCE[genes[mother]][genes[people[person]["father"]]])
+            genes[person] = gene
+            if person in evidence:
+                log_weight += evidence[person][gene]
+
+        # Rescale the running totals whenever a heavier sample turns up
+        if log_weight == -math.inf:
+            continue
+        if log_weight > shift:
+            factor = math.exp(shift - log_weight)
+            for person in order:
+                gene_weights[person] = [w * factor for w in gene_weights[person]]
+                trait_weights[person] *= factor
+            total *= factor
+            shift = log_weight
+        weight = math.exp(log_weight - shift)
+
+        for person in order:
+            gene_weights[person][genes[person]] += weight
+            trait_weights[person] += weight * has_trait[genes[person]]
+        total += weight
+
+    return gene_weights, trait_weights, total, shift
+
+
+def gibbs_sampling(people, samples, seed, burn_in=BURN_IN):
+    """
+    Estimate gene and trait distributions by Gibbs sampling: repeatedly
+    redraw each person's genes given their parents', children's and
+    partners' genes and their known trait, starting from a forward sample.
+
+    After `burn_in` sweeps, each of `samples` sweeps adds every person's
+    conditional gene distribution to their totals. Return each person's
+    gene totals and expected trait total, the number of sweeps, and a
+    shift of 0 since the totals are not scaled.
+    """
+    rng = random.Random(seed)
+    order = topological_order(people)
+    prior = [PROBS["gene"][gene] for gene in GENES]
+    has_trait = [PROBS["trait"][gene][True] for gene in GENES]
+
+    # Record each person's children, and whether they are the mother
+    children = dict((person, []) for person in order)
+    for person in order:
+        if people[person]["mother"] is not None:
+            children[people[person]["mother"]].append((person, True))
+            children[people[person]["father"]].append((person, False))
+
+    genes = dict()
+    for person in order:
+        mother = people[person]["mother"]
+        if mother is None:
+            genes[person] = draw(rng, prior)
+        else:
+            genes[person] = draw(rng, INHERITANCE[genes[mother]][genes[people[person]["father"]]])
+
+    gene_weights = dict((person, [0, 0, 0]) for person in order)
+    trait_weights = dict((person, 0) for person in order)
+    for sweep in range(burn_in + samples):
+        for person in order:
+            mother = people[person]["mother"]
+            trait = people[person]["trait"]
+            if mother is None:
+                conditional = prior.copy()
+            else:
+                inherited = INHERITANCE[genes[mother]][genes[people[person]["father"]]]
+                conditional = [inherited[gene] for gene in GENES]
+            for gene in GENES:
+                if trait is not None:
+                    conditional[gene] *= PROBS["trait"][gene][trait]
+                for child, is_mother in children[person]:
+                    other = genes[people[child]["father" if is_mother else "mother"]]
+                    pair = (gene, other) if is_mother else (other, gene)
+                    conditional[gene] *= INHERITANCE[pair[0]][pair[1]][genes[child]]
+            genes[person] = draw(rng, conditional)
+
+            # Average the conditional rather than the draw to cut variance
+            if sweep >= burn_in:
+                total = sum(conditional)
+                for gene in GENES:
+                    gene_weights[person][gene] += conditional[gene] / total
+                    trait_weights[person] += conditional[gene] / total * has_trait[gene]
+
+    return gene_weights, trait_weights, samples, 0
+
+
+def run_chain(people, method, samples, seed):
+    """
+    Run one chain of the sampler named `method`, returning the estimated
+    gene and trait distributions.
+    """
+    gene_weights, trait_weights, total, shift = SAMPLERS[method](people, samples, seed)
+
+    # The sampler's weights and total share the factor exp(-shift), which
+    # cancels here; a zero total means every sample contradicted the evidence
+    if total == 0:
+        raise ValueError("Every sample has zero weight; the evidence is impossible")
+    probabilities = empty_probabilities(people)
+    for person in people:
+        for gene in GENES:
+            probabilities[person]["gene"][gene] = gene_weights[person][gene] / total
+        probabilities[person]["trait"][True] = trait_weights[person] / total
+        probabilities[person]["trait"][False] = 1 - trait_weights[person] / total
+        if people[person]["trait"] is not None:
+            set_trait(probabilities, people, person)
+    return probabilities
+
+
+def sample_probabilities(people, method, samples=SAMPLES, chains=CHAINS, seed=0):
+    """
+    Estimate gene and trait distributions with the sampler named `method`,
+    splitting `samples` between `chains` independently seeded chains that
+    run in parallel processes. There are never more chains than samples.
+
+    Return the averaged distributions, the half-width of a 95% confidence
+    interval for each probability across chains, and the samples per
+    second achieved.
+    """
+    chains = min(chains, samples)
+    start = time.perf_counter()
+    with ProcessPoolExecutor(chains) as executor:
+        results = list(executor.map(
+            run_chain,
+            itertools.repeat(people, chains),
+            itertools.repeat(method, chains),
+            [samples // chains + (i < samples % chains) for i in range(chains)],
+            [seed * chains + i for i in range(chains)]
+        ))
+    rate = samples / (time.perf_counter() - start)
+
+    probabilities = empty_probabilities(people)
+    intervals = empty_probabilities(people)
+    for person in people:
+        for field in probabilities[person]:
+            for value in probabilities[person][field]:
+                estimates = [result[person][field][value] for result in results]
+                mean = sum(estimates) / chains
+                probabilities[person][field][value] = mean
+                if chains > 1:
+                    variance = sum((e - mean) ** 2 for e in estimates) / (chains - 1)
+                    intervals[person][field][value] = 1.96 * math.sqrt(variance / chains)
+
+    return probabilities, intervals, rate
+
+
+# Number of copies of the gene a person can have, and a factor that
+# leaves a person's gene count unconstrained
+GENES = (0, 1, 2)
+UNIFORM = dict(((gene,), 1) for gene in GENES)
+
+# Probability of each child gene count given the parents' gene counts,
+# computed once from PROBS["mutation"]
+INHERITANCE = inheritance_table()
+
+# Inference methods selectable from the command line
+METHODS = {
+    "enumerate": enumerate_probabilities,
+    "pruned": pruned_probabilities,
+    "vectorized": vectorized_probabilities,
+    "junction": junction_tree_probabilities
+}
+
+# Approximate samplers, run through `sample_probabilities`
+SAMPLERS = {
+    "likelihood": likelihood_weighting,
+    "gibbs": gibbs_sampling
+}
 
 
 if __name__ == "__main__":
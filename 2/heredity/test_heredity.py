@@ -0,0 +1,157 @@
+import itertools
+import math
+import os
+import random
+import unittest
+from fractions import Fraction
+
+from heredity import GENES, PROBS, enumerate_probabilities, load_data, log_joint_probability
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+
+def exact(p):
+    """
+    Return the float probability `p` as the decimal fraction it was written as.
+    """
+    return Fraction(str(p))
+
+
+def passes(genes):
+    """
+    Return the exact probability that a parent with `genes` copies of the
+    gene passes one on to a child.
+    """
+    mutation = exact(PROBS["mutation"])
+    return {0: mutation, 1: Fraction(1, 2), 2: 1 - mutation}[genes]
+
+
+def person_probability(people, genes, person, trait):
+    """
+    Return the exact probability of `person`'s genes given their parents',
+    times the probability of their trait given their genes.
+    """
+    mother = people[person]["mother"]
+    father = people[person]["father"]
+    gene = genes[person]
+    if mother is None:
+        p = exact(PROBS["gene"][gene])
+    else:
+        m = passes(genes[mother])
+        f = passes(genes[father])
+        p = {
+            0: (1 - m) * (1 - f),
+            1: m * (1 - f) + (1 - m) * f,
+            2: m * f
+        }[gene]
+    if trait is not None:
+        p *= exact(PROBS["trait"][gene][trait])
+    return p
+
+
+def exact_joint(people, genes, traits):
+    """
+    Return the exact joint probability of `genes` and `traits`.
+    """
+    p = Fraction(1)
+    for person in people:
+        p *= person_probability(people, genes, person, traits[person])
+    return p
+
+
+def exact_marginals(people):
+    """
+    Return each person's exact gene and trait distributions given the
+    evidence, summing over every gene assignment.
+    """
+    names = list(people)
+    marginals = {
+        person: {"gene": dict.fromkeys(GENES, Fraction(0)),
+                 "trait": dict.fromkeys([True, False], Fraction(0))}
+        for person in names
+    }
+    evidence = dict((person, people[person]["trait"]) for person in names)
+    for assignment in itertools.product(GENES, repeat=len(names)):
+        genes = dict(zip(names, assignment))
+        p = exact_joint(people, genes, evidence)
+        for person in names:
+            marginals[person]["gene"][genes[person]] += p
+            for trait in [True, False]:
+                if evidence[person] is None:
+                    marginals[person]["trait"][trait] += p * exact(PROBS["trait"][genes[person]][trait])
+                elif evidence[person] == trait:
+                    marginals[person]["trait"][trait] += p
+
+    total = sum(marginals[names[0]]["gene"].values())
+    for person in names:
+        for field in ["gene", "trait"]:
+            for value in marginals[person][field]:
+                marginals[person][field][value] /= total
+    return marginals
+
+
+def random_family(size, seed):
+    """
+    Return a random pedigree of `size` people, about half of whom have a
+    known trait.
+    """
+    rng = random.Random(seed)
+    names = [f"P{i}" for i in range(size)]
+    people = dict()
+    for i, name in enumerate(names):
+        mother = father = None
+        if i >= 2 and rng.random() < 0.7:
+            mother, father = rng.sample(names[:i], 2)
+        trait = rng.choice([True, False]) if rng.random() < 0.5 else None
+        people[name] = {"name": name, "mother": mother, "father": father, "trait": trait}
+    return people
+
+
+class TestLogJointProbability(unittest.TestCase):
+
+    def test_large_assignment(self):
+        """The log joint of hundreds of people matches exact arithmetic,
+        even though the joint itself underflows a float."""
+        people = random_family(300, seed=1)
+        rng = random.Random(2)
+        genes = dict((person, rng.choice(GENES)) for person in people)
+        traits = dict((person, rng.choice([True, False])) for person in people)
+        one_gene = set(person for person in people if genes[person] == 1)
+        two_genes = set(person for person in people if genes[person] == 2)
+        have_trait = set(person for person in people if traits[person])
+
+        p = exact_joint(people, genes, traits)
+        self.assertEqual(float(p), 0)
+        expected = math.log(p.numerator) - math.log(p.denominator)
+        actual = log_joint_probability(people, one_gene, two_genes, have_trait)
+        self.assertAlmostEqual(actual, expected, delta=1e-12 * abs(expected))
+
+
+class TestEnumerateProbabilities(unittest.TestCase):
+
+    def assertMatchesExact(self, people):
+        expected = exact_marginals(people)
+        actual = enumerate_probabilities(people)
+        for person in people:
+            for field in ["gene", "trait"]:
+                for value, p in expected[person][field].items():
+                    self.assertAlmostEqual(
+                        actual[person][field][value], float(p), places=12,
+                        msg=f"{person} {field} {value}"
+                    )
+
+    def test_bundled_families(self):
+        """Marginals for the bundled families match exact arithmetic."""
+        for k in range(3):
+            with self.subTest(family=k):
+                self.assertMatchesExact(load_data(os.path.join(DATA, f"family{k}.csv")))
+
+    def test_random_families(self):
+        """Marginals for random pedigrees match exact arithmetic."""
+        for seed in range(5):
+            with self.subTest(seed=seed):
+                self.assertMatchesExact(random_family(5, seed))
+
+
+if __name__ == "__main__":
+    unittest.main()
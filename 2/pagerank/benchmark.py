@@ -0,0 +1,239 @@
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from pagerank import *
+
+PAGES = 100000
+LINKS = 10
+SIZES = [1000, 10000, 100000, 1000000]
+TOLERANCES = [1e-3, 1e-6, 1e-9]
+
+
+def main():
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python benchmark.py crawl|incremental|solvers [pages]")
+    pages = int(sys.argv[2]) if len(sys.argv) == 3 else PAGES
+
+    if sys.argv[1] == "crawl":
+        benchmark_crawl(pages)
+    elif sys.argv[1] == "incremental":
+        benchmark_incremental(pages)
+    elif sys.argv[1] == "solvers":
+        benchmark_solvers([pages] if len(sys.argv) == 3 else SIZES)
+    else:
+        sys.exit(f"Unknown benchmark: {sys.argv[1]}")
+
+
+def generate_corpus(directory, pages, links=LINKS, seed=0):
+    """
+    Write `pages` HTML pages into `directory`, each linking to up to
+    `links` other pages chosen at random.
+    """
+    rng = random.Random(seed)
+    for i in range(pages):
+        write_page(directory, f"{i}.html", [
+            f"{rng.randrange(pages)}.html"
+            for _ in range(rng.randint(0, links))
+        ])
+
+
+def write_page(directory, filename, links):
+    """
+    Write a page called `filename` into `directory` linking to `links`.
+    """
+    items = "\n".join(
+        f'            <li><a href="{link}">{link[:-5]}</a></li>'
+        for link in links
+    )
+    with open(os.path.join(directory, filename), "w") as f:
+        f.write(
+            "<!DOCTYPE html>\n"
+            "<html lang=\"en\">\n"
+            "    <head>\n"
+            f"        <title>{filename[:-5]}</title>\n"
+            "    </head>\n"
+            "    <body>\n"
+            f"        <h1>{filename[:-5]}</h1>\n\n"
+            "        <div>Links:</div>\n"
+            "        <ul>\n"
+            f"{items}\n"
+            "        </ul>\n"
+            "    </body>\n"
+            "</html>\n"
+        )
+
+
+def benchmark_crawl(pages):
+    """
+    Crawl a generated corpus of `pages` pages serially and in parallel,
+    reporting throughput, then time loading the saved link graph.
+    """
+    directory = tempfile.mkdtemp()
+    try:
+        print(f"Generating corpus of {pages} pages")
+        generate_corpus(directory, pages)
+        size = sum(
+            os.path.getsize(os.path.join(directory, filename))
+            for filename in os.listdir(directory)
+        )
+
+        for workers in [1, None]:
+            start = time.perf_counter()
+            corpus = crawl(directory, workers=workers)
+            elapsed = time.perf_counter() - start
+            label = "serial" if workers == 1 else f"{os.cpu_count()} workers"
+            print(f"Crawl ({label}): {elapsed:.2f}s, "
+                  f"{pages / elapsed:,.0f} files/sec, "
+                  f"{size / elapsed / 2**20:,.1f} MiB/sec")
+
+        filename = os.path.join(directory, "graph.npz")
+        save_graph(link_graph(corpus), filename)
+        start = time.perf_counter()
+        load_graph(filename)
+        elapsed = time.perf_counter() - start
+        print(f"Load saved graph: {elapsed:.2f}s "
+              f"({os.path.getsize(filename) / 2**20:,.1f} MiB on disk)")
+    finally:
+        shutil.rmtree(directory)
+
+
+def benchmark_incremental(pages, changes=10, tolerance=1e-8):
+    """
+    Edit, add and remove a few pages of a generated corpus, then compare
+    a warm-started incremental update against a cold recomputation.
+    """
+    directory = tempfile.mkdtemp()
+    try:
+        print(f"Generating corpus of {pages} pages")
+        generate_corpus(directory, pages)
+        state = os.path.join(directory, "state.npz")
+        incremental_pagerank(directory, state, DAMPING, tolerance)
+
+        # Rewrite some pages, add new ones and delete others
+        rng = random.Random(1)
+        for i in rng.sample(range(pages), changes):
+            write_page(directory, f"{i}.html", [
+                f"{rng.randrange(pages)}.html" for _ in range(LINKS)
+            ])
+        for i in range(pages, pages + changes):
+            write_page(directory, f"{i}.html", [
+                f"{rng.randrange(pages)}.html" for _ in range(LINKS)
+            ])
+        for i in rng.sample(range(pages), changes):
+            os.remove(os.path.join(directory, f"{i}.html"))
+        print(f"Edited, added and removed {changes} pages each")
+
+        start = time.perf_counter()
+        graph = link_graph(crawl(directory))
+        _, cold = power_iteration(graph, DAMPING, tolerance)
+        elapsed = time.perf_counter() - start
+        print(f"Cold start: {cold} iterations, {elapsed:.2f}s")
+
+        start = time.perf_counter()
+        _, warm = incremental_pagerank(directory, state, DAMPING, tolerance)
+        elapsed = time.perf_counter() - start
+        print(f"Warm start: {warm} iterations, {elapsed:.2f}s "
+              f"({cold - warm} iterations saved)")
+    finally:
+        shutil.rmtree(directory)
+
+
+def power_law_graph(pages, links=LINKS, exponent=2.1, seed=0):
+    """
+    Return a LinkGraph of `pages` pages whose out-degrees and in-degrees
+    both follow power laws with the given `exponent`, averaging about
+    `links` links per page.
+    """
+    rng = np.random.default_rng(seed)
+    outdegree = np.minimum(rng.zipf(exponent, pages) - 1, pages - 1)
+    outdegree = (outdegree * links / max(outdegree.mean(), 1)).astype(np.int64)
+    sources = np.repeat(np.arange(pages), outdegree)
+
+    # Popular pages are linked to far more often than others
+    popularity = 1 / np.arange(1, pages + 1) ** (1 / (exponent - 1))
+    targets = rng.choice(pages, size=len(sources), p=popularity / popularity.sum())
+    targets = rng.permutation(pages)[targets]
+
+    keep = sources != targets
+    return graph_from_edges(
+        [f"{i}.html" for i in range(pages)], sources[keep], targets[keep]
+    )
+
+
+def measure(solver, *args, **kwargs):
+    """
+    Run `solver` and return its result, wall time in seconds and peak
+    memory allocated in bytes.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = solver(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def benchmark_solvers(sizes):
+    """
+    Run every PageRank solver on power-law graphs of each size in `sizes`,
+    reporting iterations, final L1 residual, wall time, peak memory and
+    the largest error against a tightly converged reference.
+    """
+    for pages in sizes:
+        graph = power_law_graph(pages)
+        print(f"{pages} pages, {len(graph.sources)} links")
+        reference, _ = power_iteration(graph, DAMPING, 1e-13)
+        reference = dict(zip(graph.pages, reference.tolist()))
+
+        runs = [
+            ("sampling", f"n = {10 * pages}", sample_pagerank,
+             (graph, DAMPING, 10 * pages), dict(seed=0))
+        ]
+        for tolerance in TOLERANCES:
+            runs.append(
+                ("iterate", f"tol = {tolerance:g}", iterate_pagerank,
+                 (graph, DAMPING, tolerance), dict())
+            )
+            runs.append(
+                ("adaptive", f"tol = {tolerance:g}", adaptive_pagerank,
+                 (graph, DAMPING, tolerance), dict())
+            )
+            runs.append(
+                ("aitken", f"tol = {tolerance:g}", adaptive_pagerank,
+                 (graph, DAMPING, tolerance), dict(aitken=True))
+            )
+
+        for name, setting, solver, args, kwargs in runs:
+            residuals = []
+            work = []
+            if name in ["adaptive", "aitken"]:
+                kwargs = dict(kwargs, residuals=residuals, work=work)
+            elif name != "sampling":
+                kwargs = dict(kwargs, residuals=residuals)
+            ranks, elapsed, peak = measure(solver, *args, **kwargs)
+
+            # Power iteration reads every link and page once per iteration
+            if name == "iterate":
+                work = [len(graph.sources) + pages] * len(residuals)
+
+            error = max(abs(ranks[page] - reference[page]) for page in ranks)
+            residual = f"{residuals[-1]:.1e}" if residuals else "-"
+            operations = f"{sum(work):.2e}" if work else "-"
+            print(f"  {name:<10} {setting:<14} "
+                  f"iterations {len(residuals) or '-':>4}  "
+                  f"residual {residual:>7}  "
+                  f"operations {operations:>8}  "
+                  f"time {elapsed:8.3f}s  "
+                  f"memory {peak / 2**20:8.1f} MiB  "
+                  f"max error {error:.1e}")
+
+if __name__ == "__main__":
+    main()
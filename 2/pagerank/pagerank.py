@@ -1,18 +1,58 @@
+import itertools
+import math
 import os
 import random
 import re
 import sys
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
 from decimal import *
-from numpy.random import choice
+
+import numpy as np
+from scipy.sparse import csr_matrix
 
 DAMPING = 0.85
 SAMPLES = 10000
+SURFERS = 1000
+TOLERANCE = 0.001
+
+# Surfers walk until their uniform start has faded to this weight,
+# damping_factor ** steps, before their pages are counted
+BURN_IN = 1e-4
+
+# Files are read this many characters at a time while crawling, and
+# corpora with at least `PARALLEL_CRAWL` pages are parsed in parallel
+CHUNK_SIZE = 1 << 16
+PARALLEL_CRAWL = 1000
+
+# Block Gauss-Seidel updates pages in this many blocks per sweep, and
+# can extrapolate the ranks every `AITKEN_PERIOD` sweeps
+BLOCKS = 64
+AITKEN_PERIOD = 5
+LINK = re.compile(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+
+# Link structure of a corpus in compressed sparse row form, indexed by
+# the position of each page in `pages`. The links into page `i` come from
+# pages `sources[indptr[i]:indptr[i + 1]]`, and `outdegree[j]` is the
+# number of links out of page `j`. `matrix` is the same structure as a
+# sparse matrix whose entry (i, j) is 1 if page `j` links to page `i`.
+LinkGraph = namedtuple(
+    "LinkGraph", ["pages", "indptr", "sources", "outdegree", "matrix"]
+)
 
 
 def main():
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python pagerank.py corpus")
-    corpus = crawl(sys.argv[1])
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python pagerank.py corpus [graph.npz]")
+
+    # Load a previously saved link graph, or crawl a corpus directory
+    if os.path.isfile(sys.argv[1]):
+        corpus = load_graph(sys.argv[1])
+    else:
+        corpus = crawl(sys.argv[1])
+    if len(sys.argv) == 3:
+        save_graph(as_graph(corpus), sys.argv[2])
+
     #print(transition_model(corpus, "3.html", DAMPING))
     ranks = sample_pagerank(corpus, DAMPING, SAMPLES)
     print(f"PageRank Results from Sampling (n = {SAMPLES})")
@@ -24,22 +64,57 @@ def main():
         print(f"  {page}: {ranks[page]:.4f}")
 
 
-def crawl(directory):
+def extract_links(path, chunk_size=CHUNK_SIZE):
+    """
+    Return the set of link targets in the HTML file at `path`, reading
+    the file `chunk_size` characters at a time.
+    """
+    links = set()
+    carry = ""
+    with open(path) as f:
+        while True:
+            chunk = f.read(chunk_size)
+            contents = carry + chunk
+            links.update(LINK.findall(contents))
+            if not chunk:
+                break
+
+            # A tag cut off by the end of the chunk starts at the last "<",
+            # so rescan from there once the next chunk has been read
+            start = contents.rfind("<")
+            carry = contents[start:] if start != -1 else ""
+    return links
+
+
+def crawl(directory, workers=None, chunk_size=CHUNK_SIZE):
     """
     Parse a directory of HTML pages and check for links to other pages.
     Return a dictionary where each key is a page, and values are
     a list of all other pages in the corpus that are linked to by the page.
+
+    Large corpora are parsed on a pool of `workers` processes
+    (by default one per CPU).
     """
-    pages = dict()
+    filenames = [
+        filename for filename in os.listdir(directory)
+        if filename.endswith(".html")
+    ]
+    paths = [os.path.join(directory, filename) for filename in filenames]
 
     # Extract all links from HTML files
-    for filename in os.listdir(directory):
-        if not filename.endswith(".html"):
-            continue
-        with open(os.path.join(directory, filename)) as f:
-            contents = f.read()
-            links = re.findall(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"", contents)
-            pages[filename] = set(links) - {filename}
+    if len(paths) < PARALLEL_CRAWL or workers == 1:
+        results = [extract_links(path, chunk_size) for path in paths]
+    else:
+        workers = workers or os.cpu_count()
+        with ProcessPoolExecutor(workers) as executor:
+            results = list(executor.map(
+                extract_links, paths, itertools.repeat(chunk_size),
+                chunksize=max(1, len(paths) // (workers * 4))
+            ))
+    pages = dict(
+        (filename, links - {filename})
+        for filename, links in zip(filenames, results)
+    )
 
     # Only include links to other pages in the corpus
     for filename in pages:
@@ -51,6 +126,33 @@ def crawl(directory):
     return pages
 
 
+def save_graph(graph, filename):
+    """
+    Save `graph` to `filename` as a compressed NumPy archive holding the
+    page names and an edge list of (source, target) page indices.
+    """
+    targets = np.repeat(np.arange(len(graph.pages)), np.diff(graph.indptr))
+
+    # Write through a file so NumPy does not append ".npz" to the name
+    with open(filename, "wb") as f:
+        np.savez_compressed(
+            f,
+            pages=np.array(graph.pages, dtype=str),
+            sources=graph.sources.astype(np.int32),
+            targets=targets.astype(np.int32)
+        )
+
+
+def load_graph(filename):
+    """
+    Load a LinkGraph written by `save_graph`.
+    """
+    with np.load(filename) as data:
+        return graph_from_edges(
+            data["pages"].tolist(), data["sources"], data["targets"]
+        )
+
+
 def transition_model(corpus, page, damping_factor):
     """
     Return a probability distribution over which page to visit next,
@@ -97,98 +199,444 @@ def transition_model(corpus, page, damping_factor):
     return model
 
 
-def sample_pagerank(corpus, damping_factor, n):
+def sample_pagerank(corpus, damping_factor, n, surfers=SURFERS, seed=None):
     """
     Return PageRank values for each page by sampling `n` pages
     according to transition model, starting with a page at random.
 
+    The samples are drawn by `surfers` independent random surfers that
+    advance together, each starting on a random page and walking until
+    that start has faded to a weight of BURN_IN before its pages are
+    counted. Passing `seed` makes the result reproducible.
+
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
     """
+    graph = as_graph(corpus)
+    indptr, targets = outlinks(graph)
+    outdegree = graph.outdegree
+    pages = len(graph.pages)
+    rng = np.random.default_rng(seed)
+
+    def step(current):
+        # Follow a random link with probability `damping_factor`, unless
+        # the page has no links; otherwise jump to a random page
+        following = (rng.random(len(current)) < damping_factor) & (outdegree[current] > 0)
+        nxt = rng.integers(pages, size=len(current))
+        origin = current[following]
+        offset = (rng.random(len(origin)) * outdegree[origin]).astype(np.int64)
+        nxt[following] = targets[indptr[origin] + offset]
+        return nxt
+
+    # A surfer's page after k steps still depends on where it started
+    # with weight damping_factor ** k, so walk that off first
+    current = rng.integers(pages, size=min(surfers, n))
+    if 0 < damping_factor < 1:
+        for _ in range(math.ceil(math.log(BURN_IN) / math.log(damping_factor))):
+            current = step(current)
+
+    counts = np.zeros(pages, dtype=np.int64)
+    taken = 0
+    while True:
+        batch = min(len(current), n - taken)
+        counts += np.bincount(current[:batch], minlength=pages)
+        taken += batch
+        if taken == n:
+            break
+        current = step(current)
+
+    return dict(zip(graph.pages, (counts / n).tolist()))
+
+
+def link_graph(corpus):
+    """
+    Build the sparse LinkGraph for `corpus`, a dictionary mapping each
+    page to the set of pages it links to.
+    """
     pages = list(corpus.keys())
-    weights = []
-    current_page = random.choice(pages)
-    page_rank = dict((page, 0) for page in pages)
-    total = 1
-    page_rank[current_page] += 1
-    getcontext().prec = 4
+    index = dict((page, i) for i, page in enumerate(pages))
 
-    for i in range(n):
-        weights = list((transition_model(corpus, current_page, damping_factor)).values())
-        current_page = choice(pages, p=weights)
-        page_rank[current_page] += 1
-        total += 1
+    sources = []
+    targets = []
+    for page, links in corpus.items():
+        for link in links:
+            sources.append(index[page])
+            targets.append(index[link])
 
-    for page in pages:
-        page_rank[page] = round(float(Decimal(page_rank[page]) / Decimal(total)), 4)
+    return graph_from_edges(pages, sources, targets)
 
-    sum = 0
-    for value in list(page_rank.values()):
-        sum += value
-        sum = round(sum, 4)
 
-    if sum < 1:
-        while int(sum) != 1:
-            page_rank[random.choice(list(page_rank.keys()))] += 0.0001
-            sum += 0.0001
-            sum = round(sum, 4)
-    else:
-        while sum != 1:
-            page_rank[random.choice(list(page_rank.keys()))] -= 0.0001
-            sum -= 0.0001
-            sum = round(sum, 4)
+def graph_from_edges(pages, sources, targets):
+    """
+    Build a LinkGraph over `pages` from parallel sequences of source and
+    target page indices.
+    """
+    sources = np.asarray(sources, dtype=np.int64)
+    targets = np.asarray(targets, dtype=np.int64)
 
-    return page_rank
+    # Sort links by target page so each page's inbound links are contiguous
+    order = np.argsort(targets, kind="stable")
+    indegree = np.bincount(targets, minlength=len(pages))
+    indptr = np.zeros(len(pages) + 1, dtype=np.int64)
+    np.cumsum(indegree, out=indptr[1:])
+    outdegree = np.bincount(sources, minlength=len(pages))
+    sources = sources[order]
+    matrix = csr_matrix(
+        (np.ones(len(sources)), sources, indptr),
+        shape=(len(pages), len(pages))
+    )
 
+    return LinkGraph(pages, indptr, sources, outdegree, matrix)
 
-def linksTo(corpus, target):
-    pages = []
-    key_list = list(corpus.keys())
-    val_list = list(corpus.values())
-    i = 0
-    for value in val_list:
-        if target in value:
-            pages.append(key_list[i])
-        i += 1
 
-    return pages
+def as_graph(corpus):
+    """
+    Return `corpus` as a LinkGraph, building one if it is a dictionary.
+    """
+    if isinstance(corpus, LinkGraph):
+        return corpus
+    return link_graph(corpus)
+
+
+def spread(graph, ranks):
+    """
+    Return the rank each page receives from the pages linking to it,
+    where every page splits `ranks` evenly over its outbound links.
+    `ranks` may also be a matrix with one column of ranks per solve.
+    Pages without links contribute nothing; see `power_iteration`.
+    """
+    outdegree = np.maximum(graph.outdegree, 1)
+    if ranks.ndim == 2:
+        outdegree = outdegree[:, None]
+    return graph.matrix @ (ranks / outdegree)
 
 
-def iterate_pagerank(corpus, damping_factor):
+def outlinks(graph):
+    """
+    Return the outbound links of `graph` in compressed sparse row form:
+    the links out of page `i` point to `targets[indptr[i]:indptr[i + 1]]`.
+    """
+    indegree = np.diff(graph.indptr)
+    targets = np.repeat(np.arange(len(graph.pages)), indegree)
+    order = np.argsort(graph.sources, kind="stable")
+    indptr = np.zeros(len(graph.pages) + 1, dtype=np.int64)
+    np.cumsum(graph.outdegree, out=indptr[1:])
+    return indptr, targets[order]
+
+
+def power_iteration(graph, damping_factor, tolerance=TOLERANCE, start=None,
+                    teleport=None, residuals=None):
+    """
+    Compute PageRank over `graph` by power iteration.
+
+    With probability `1 - damping_factor` the surfer jumps to a page drawn
+    from `teleport`, a distribution over the pages that defaults to
+    uniform. A page with no links is treated as linking according to
+    `teleport` too. `teleport` may be a matrix with one distribution per
+    column, in which case all of them are solved together and the result
+    has a column for each.
+
+    Iteration starts from the uniform distribution, or from `start` if
+    given, and stops once no page's rank changes by more than `tolerance`.
+    If `residuals` is a list, the L1 change in ranks at each iteration is
+    appended to it (the largest change over the columns of a batch).
+
+    Return an array of ranks in the order of `graph.pages`, and the number
+    of iterations performed.
+    """
+    n = len(graph.pages)
+    dangling = graph.outdegree == 0
+    if teleport is None:
+        teleport = np.full(n, 1 / n)
+    else:
+        teleport = np.asarray(teleport, dtype=float)
+        teleport = teleport / teleport.sum(axis=0)
+
+    if start is None:
+        ranks = np.full(teleport.shape, 1 / n)
+    else:
+        ranks = np.asarray(start, dtype=float)
+        ranks = ranks / ranks.sum(axis=0)
+    iterations = 0
+
+    while True:
+        new_ranks = damping_factor * spread(graph, ranks)
+        new_ranks += (
+            1 - damping_factor * (1 - ranks[dangling].sum(axis=0))
+        ) * teleport
+        iterations += 1
+
+        change = np.abs(new_ranks - ranks)
+        if residuals is not None:
+            residuals.append(float(change.sum(axis=0).max()))
+        delta = change.max()
+        ranks = new_ranks
+        if delta <= tolerance:
+            break
+
+    return ranks, iterations
+
+
+def iterate_pagerank(corpus, damping_factor, tolerance=TOLERANCE, residuals=None):
     """
     Return PageRank values for each page by iteratively updating
     PageRank values until convergence.
 
+    If `residuals` is a list, the L1 change in ranks at each iteration
+    is appended to it.
+
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
     """
-    pages = list(corpus.keys())
-    page_rank = dict((page, round(1/len(pages), 4)) for page in pages)
+    graph = as_graph(corpus)
+    ranks, _ = power_iteration(
+        graph, damping_factor, tolerance, residuals=residuals
+    )
+    return dict(zip(graph.pages, ranks.tolist()))
+
+
+def adaptive_iteration(graph, damping_factor, tolerance=TOLERANCE,
+                       blocks=BLOCKS, freeze=True, aitken=False,
+                       residuals=None, work=None):
+    """
+    Compute PageRank over `graph` by block Gauss-Seidel iteration.
+
+    The pages are split into `blocks` contiguous blocks that are updated
+    in turn, each using the ranks already updated earlier in the same
+    sweep. With `freeze`, a page whose rank changes by less than a tenth
+    of `tolerance` in two successive sweeps is no longer recomputed. With `aitken`,
+    Aitken extrapolation is applied to the ranks every `AITKEN_PERIOD`
+    sweeps. Iteration stops once a sweep over every page leaves no rank
+    more than about `tolerance` from its limit, judging by how fast the
+    changes are shrinking.
+
+    If given, `residuals` and `work` are lists that receive the L1 change
+    in ranks and the number of links and pages processed at each sweep.
+
+    Return an array of ranks in the order of `graph.pages`, and the number
+    of sweeps performed.
+    """
+    n = len(graph.pages)
+    dangling = graph.outdegree == 0
+    share = 1 / np.maximum(graph.outdegree, 1)
+    bounds = np.linspace(0, n, min(blocks, n) + 1).astype(np.int64)
+
+    ranks = np.full(n, 1 / n)
+    active = np.ones(n, dtype=bool)
+    settled = np.zeros(n, dtype=bool)
+    history = []
+    previous = None
+    sweeps = 0
 
     while True:
-        old_rank = page_rank.copy()
+        full = active.all()
+        old_ranks = ranks.copy()
+        total = ranks.sum()
+        dangling_total = ranks[dangling].sum()
+        operations = 0
+
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            rows = start + np.flatnonzero(active[start:end])
+            if len(rows) == 0:
+                continue
+            links = graph.matrix[rows]
+            jump = ((1 - damping_factor) * total + damping_factor * dangling_total) / n
+            new = damping_factor * (links @ (ranks * share)) + jump
+            operations += links.nnz + len(rows)
+
+            # Update in place, keeping the running totals current
+            total += new.sum() - ranks[rows].sum()
+            dangling_total += new[dangling[rows]].sum() - ranks[rows][dangling[rows]].sum()
+            ranks[rows] = new
+
+        ranks /= ranks.sum()
+        sweeps += 1
+
+        change = np.abs(ranks - old_ranks)
+        if residuals is not None:
+            residuals.append(float(change.sum()))
+        if work is not None:
+            work.append(operations)
+        # The ranks are still about rate / (1 - rate) times the last change
+        # from their limit, where the rate of convergence is estimated from
+        # successive changes and never taken to beat `damping_factor`
+        largest = change.max()
+        rate = damping_factor
+        if previous:
+            rate = min(largest / previous, damping_factor)
+        previous = largest
+        converged = rate < 1 and largest * rate / (1 - rate) <= tolerance
+        if converged and full:
+            break
+        if freeze:
+            small = change < tolerance / 10
+            active &= ~(small & settled)
+            settled = small
+
+        # Frozen pages may have drifted, so convergence only counts once a
+        # sweep over every page confirms it
+        if converged or not active.any():
+            active[:] = True
+            settled[:] = False
+            history = []
+            continue
 
-        for page in page_rank.keys():
-            rank = round(((1 - damping_factor) / len(pages)), 4)
-            summation = 0
-            links = linksTo(corpus, page)
-            for link in links:
-                summation += round((old_rank[link] / len(corpus[link])), 4)
+        # Extrapolate only the pages that are still being recomputed, and
+        # let them settle again before any are frozen
+        if aitken:
+            history.append(ranks.copy())
+            if len(history) == 3 and sweeps % AITKEN_PERIOD == 0:
+                ranks = np.where(active, extrapolate(*history), ranks)
+                ranks /= ranks.sum()
+                settled[:] = False
+                history = []
+                previous = None
+            elif len(history) == 3:
+                history.pop(0)
 
-            rank += damping_factor * round(summation, 4)
-            page_rank[page] = round(rank, 4)
+    return ranks, sweeps
 
-        i = 0
-        for page in pages:
-            if abs(page_rank[page] - old_rank[page]) <= 0.001:
-                i += 1
 
-        if i == len(pages):
-            break
+def extrapolate(first, second, third):
+    """
+    Return the Aitken extrapolation of three successive rank vectors,
+    keeping the latest ranks wherever the extrapolation is unstable.
+    """
+    step = third - second
+    curvature = step - (second - first)
+    stable = np.abs(curvature) > 1e-15
+    ranks = third.copy()
+    ranks[stable] -= step[stable] ** 2 / curvature[stable]
+    ranks = np.where(ranks > 0, ranks, third)
+    return ranks / ranks.sum()
+
 
-    return page_rank
+def adaptive_pagerank(corpus, damping_factor, tolerance=TOLERANCE, **options):
+    """
+    Return PageRank values for each page computed by `adaptive_iteration`,
+    which accepts the same `options`.
+    """
+    graph = as_graph(corpus)
+    ranks, _ = adaptive_iteration(graph, damping_factor, tolerance, **options)
+    return dict(zip(graph.pages, ranks.tolist()))
+
+
+def personalized_pagerank(corpus, damping_factor, teleport, tolerance=TOLERANCE):
+    """
+    Return personalized PageRank values for each page, where the random
+    surfer teleports to pages in proportion to the weights in `teleport`,
+    a dictionary mapping pages to weights (pages left out weigh 0).
+
+    `teleport` may also be a list of such dictionaries, in which case a
+    list of results is returned. The whole batch is solved in a single
+    power iteration over a block of rank vectors.
+    """
+    graph = as_graph(corpus)
+    batch = isinstance(teleport, list)
+    distributions = teleport if batch else [teleport]
+
+    index = dict((page, i) for i, page in enumerate(graph.pages))
+    vectors = np.zeros((len(graph.pages), len(distributions)))
+    for column, distribution in enumerate(distributions):
+        for page, weight in distribution.items():
+            vectors[index[page], column] = weight
+
+    ranks, _ = power_iteration(
+        graph, damping_factor, tolerance, teleport=vectors
+    )
+    results = [
+        dict(zip(graph.pages, column.tolist())) for column in ranks.T
+    ]
+    return results if batch else results[0]
+
+
+def incremental_pagerank(directory, state, damping_factor, tolerance=TOLERANCE):
+    """
+    Return PageRank values for the pages in `directory`, reusing the
+    results of the previous run stored in the file `state`.
+
+    Only pages added or modified since the previous run are parsed, and
+    iteration is warm-started from the previous ranks. The new link graph
+    and ranks are then written back to `state`.
+
+    Return the ranks as a dictionary, and the number of iterations taken.
+    """
+    previous = load_state(state) if os.path.exists(state) else dict()
+
+    # Re-parse only pages whose size or modification time changed
+    links = dict()
+    stamps = dict()
+    for filename in os.listdir(directory):
+        if not filename.endswith(".html"):
+            continue
+        info = os.stat(os.path.join(directory, filename))
+        stamps[filename] = (info.st_mtime_ns, info.st_size)
+        if filename in previous and previous[filename]["stamp"] == stamps[filename]:
+            links[filename] = previous[filename]["links"]
+        else:
+            links[filename] = extract_links(os.path.join(directory, filename))
+
+    corpus = dict(
+        (filename, set(
+            link for link in links[filename]
+            if link in links and link != filename
+        ))
+        for filename in links
+    )
+    graph = link_graph(corpus)
+
+    # Pages that are new to the corpus start from the uniform rank
+    start = np.array([
+        previous[page]["rank"] if page in previous else 1 / len(graph.pages)
+        for page in graph.pages
+    ])
+    ranks, iterations = power_iteration(graph, damping_factor, tolerance, start)
+
+    save_state(state, links, stamps, dict(zip(graph.pages, ranks.tolist())))
+    return dict(zip(graph.pages, ranks.tolist())), iterations
+
+
+def save_state(filename, links, stamps, ranks):
+    """
+    Save the unfiltered links, (modification time, size) stamps and ranks
+    of each page to `filename` for use by `incremental_pagerank`.
+    """
+    pages = list(links.keys())
+    targets = [sorted(links[page]) for page in pages]
+    offsets = np.zeros(len(pages) + 1, dtype=np.int64)
+    np.cumsum([len(t) for t in targets], out=offsets[1:])
+    with open(filename, "wb") as f:
+        np.savez_compressed(
+            f,
+            pages=np.array(pages, dtype=str),
+            links=np.array(list(itertools.chain.from_iterable(targets)), dtype=str),
+            offsets=offsets,
+            stamps=np.array([stamps[page] for page in pages], dtype=np.int64).reshape(-1, 2),
+            ranks=np.array([ranks[page] for page in pages])
+        )
+
+
+def load_state(filename):
+    """
+    Load the state written by `save_state`, as a dictionary mapping each
+    page to its "links", "stamp" and "rank".
+    """
+    with np.load(filename) as data:
+        links = data["links"].tolist()
+        offsets = data["offsets"].tolist()
+        return dict(
+            (page, {
+                "links": set(links[offsets[i]:offsets[i + 1]]),
+                "stamp": tuple(stamp),
+                "rank": rank
+            })
+            for i, (page, stamp, rank) in enumerate(zip(
+                data["pages"].tolist(), data["stamps"].tolist(),
+                data["ranks"].tolist()
+            ))
+        )
 
 
 if __name__ == "__main__":
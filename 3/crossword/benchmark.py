@@ -0,0 +1,194 @@
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from generate import *
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+REPEATS = 20
+
+# Defaults for generated benchmarks: grid side length, fraction of blocked
+# cells, dictionary size, number of grids and node limit per search
+SIZE = 9
+DENSITY = 0.25
+WORDS = 20000
+GRIDS = 10
+NODE_LIMIT = 20000
+
+
+def main():
+    if len(sys.argv) >= 2 and sys.argv[1] == "generated":
+        if len(sys.argv) > 6:
+            sys.exit("Usage: python benchmark.py generated [size] [density] [words] [grids]")
+        size = int(sys.argv[2]) if len(sys.argv) > 2 else SIZE
+        density = float(sys.argv[3]) if len(sys.argv) > 3 else DENSITY
+        words = int(sys.argv[4]) if len(sys.argv) > 4 else WORDS
+        grids = int(sys.argv[5]) if len(sys.argv) > 5 else GRIDS
+        benchmark_generated(size, density, words, grids)
+        return
+
+    if len(sys.argv) not in [1, 2]:
+        sys.exit("Usage: python benchmark.py [repeats]")
+    repeats = int(sys.argv[1]) if len(sys.argv) == 2 else REPEATS
+
+    # Solve each bundled structure with its own and the largest word list
+    header()
+    for k in range(3):
+        for words in sorted({k, 2}):
+            structure = os.path.join(DATA, f"structure{k}.txt")
+            vocabulary = os.path.join(DATA, f"words{words}.txt")
+            benchmark(structure, vocabulary, repeats)
+
+
+def generate_grid(size, density, seed=0):
+    """
+    Return the rows of a `size` by `size` crossword structure in which
+    `density` of the cells are blocked, symmetric under a half turn
+    like a published crossword.
+    """
+    rng = random.Random(seed)
+    cells = [
+        (i, j) for i in range(size) for j in range(size)
+        if (i, j) <= (size - 1 - i, size - 1 - j)
+    ]
+    blocked = [[False] * size for _ in range(size)]
+    for i, j in rng.sample(cells, round(density * len(cells))):
+        blocked[i][j] = blocked[size - 1 - i][size - 1 - j] = True
+    return ["".join("#" if cell else "_" for cell in row) for row in blocked]
+
+
+def generate_words(count, lengths, seed=0):
+    """
+    Return a list of up to `count` distinct made-up words, spread evenly
+    over `lengths` and spelled with the letter pair frequencies of the
+    bundled vocabulary.
+    """
+    with open(os.path.join(DATA, "words2.txt")) as f:
+        corpus = [word for word in f.read().upper().split() if word.isalpha()]
+    following = dict()
+    for word in corpus:
+        for letter, successor in zip("^" + word, word):
+            following.setdefault(letter, []).append(successor)
+
+    rng = random.Random(seed)
+    lengths = list(lengths)
+    words = set()
+    for attempt in range(100 * count):
+        if len(words) == count:
+            break
+        letter = "^"
+        word = ""
+        for _ in range(lengths[attempt % len(lengths)]):
+            letter = rng.choice(following.get(letter, following["^"]))
+            word += letter
+        words.add(word)
+    return sorted(words)
+
+
+def profile(structure, words, limit=None):
+    """
+    Load and solve the crossword, timing each stage separately.
+
+    Return a dict of the seconds spent loading, enforcing node consistency,
+    running AC-3 and backtracking, the search counters, and whether a
+    solution was found (None if the search hit `limit` nodes).
+    """
+    start = time.perf_counter()
+    crossword = Crossword(structure, words)
+    loaded = time.perf_counter()
+    creator = CrosswordCreator(crossword, limit=limit)
+    creator.enforce_node_consistency()
+    node = time.perf_counter()
+    consistent = creator.ac3()
+    arc = time.perf_counter()
+    try:
+        solved = consistent and creator.backtrack(dict()) is not None
+    except SearchLimit:
+        solved = None
+    searched = time.perf_counter()
+
+    return {
+        "load": loaded - start,
+        "node": node - loaded,
+        "ac3": arc - node,
+        "search": searched - arc,
+        "nodes": creator.nodes,
+        "backtracks": creator.backtracks,
+        "revisions": creator.revisions,
+        "solved": solved
+    }
+
+
+def header():
+    """
+    Print the column headings of `report`.
+    """
+    print(f"{'':<30} {'result':<12} {'load':>8} {'node':>8} {'ac3':>8} "
+          f"{'search':>8} {'nodes':>8} {'backtracks':>10} {'revisions':>10} "
+          f"{'nodes/sec':>10}")
+
+
+def report(name, runs):
+    """
+    Print the mean stage times in milliseconds and counters of `runs`,
+    and the search nodes expanded per second of backtracking.
+    """
+    mean = dict(
+        (key, sum(run[key] for run in runs) / len(runs))
+        for key in ["load", "node", "ac3", "search", "nodes", "backtracks", "revisions"]
+    )
+    solved = [run["solved"] for run in runs]
+    if all(solved):
+        result = "solved"
+    elif None in solved:
+        result = f"{solved.count(None)} over limit"
+    else:
+        result = f"{solved.count(True)}/{len(solved)} solved"
+    print(f"{name:<30} {result:<12} "
+          f"{mean['load'] * 1000:8.2f} {mean['node'] * 1000:8.2f} "
+          f"{mean['ac3'] * 1000:8.2f} {mean['search'] * 1000:8.2f} "
+          f"{mean['nodes']:8.0f} {mean['backtracks']:10.0f} {mean['revisions']:10.0f} "
+          f"{mean['nodes'] / mean['search'] if mean['search'] else 0:10,.0f}")
+
+
+def benchmark(structure, words, repeats):
+    """
+    Solve the crossword `repeats` times and report the mean time of each
+    stage in milliseconds along with the search counters.
+    """
+    runs = [profile(structure, words) for _ in range(repeats)]
+    report(f"{os.path.basename(structure)} + {os.path.basename(words)}", runs)
+
+
+def benchmark_generated(size, density, words, grids, limit=NODE_LIMIT):
+    """
+    Solve `grids` random `size` by `size` structures with the given blocked
+    cell `density` against a made-up dictionary of `words` words, reporting
+    each grid and the mean over all of them.
+    """
+    directory = tempfile.mkdtemp()
+    try:
+        vocabulary = os.path.join(directory, "words.txt")
+        with open(vocabulary, "w") as f:
+            f.write("\n".join(generate_words(words, range(2, size + 1))))
+
+        print(f"{grids} grids of {size}x{size} at density {density:g}, "
+              f"{words} words, node limit {limit}")
+        header()
+        runs = []
+        for seed in range(grids):
+            structure = os.path.join(directory, f"grid{seed}.txt")
+            with open(structure, "w") as f:
+                f.write("\n".join(generate_grid(size, density, seed)))
+            runs.append(profile(structure, vocabulary, limit))
+            report(f"grid{seed}.txt", runs[-1:])
+        report("mean", runs)
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
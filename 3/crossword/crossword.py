@@ -16,8 +16,11 @@ class Variable():
                  self.j + (k if self.direction == Variable.ACROSS else 0))
             )
 
+        # Variables are dictionary keys throughout the solver, so hash once
+        self.hash = hash((self.i, self.j, self.direction, self.length))
+
     def __hash__(self):
-        return hash((self.i, self.j, self.direction, self.length))
+        return self.hash
 
     def __eq__(self, other):
         return (
@@ -35,6 +38,13 @@ class Variable():
         return f"Variable({self.i}, {self.j}, {direction}, {self.length})"
 
 
+class Overlaps(dict):
+    """Overlaps between pairs of variables, which are None if not stored."""
+
+    def __missing__(self, key):
+        return None
+
+
 class Crossword():
 
     def __init__(self, structure_file, words_file):
@@ -61,6 +71,23 @@ class Crossword():
         with open(words_file) as f:
             self.words = set(f.read().upper().splitlines())
 
+        # Index the vocabulary: `vocabulary[length]` lists the words of each
+        # length in sorted order, `positions[word]` is a word's place in that
+        # list, and `index[length][i][letter]` is a bitset of the words of
+        # that length with `letter` at position `i` (bit k for word k)
+        self.vocabulary = dict()
+        for word in sorted(self.words):
+            self.vocabulary.setdefault(len(word), []).append(word)
+        self.positions = dict(
+            (word, k)
+            for words in self.vocabulary.values()
+            for k, word in enumerate(words)
+        )
+        self.index = {
+            length: letter_masks(words, length)
+            for length, words in self.vocabulary.items()
+        }
+
         # Determine variable set
         self.variables = set()
         for i in range(self.height):
@@ -104,30 +131,96 @@ class Crossword():
                             length=length
                         ))
 
+        # Number the variables in reading order
+        self.variable_list = sorted(
+            self.variables, key=lambda v: (v.i, v.j, v.direction)
+        )
+        ids = dict((var, k) for k, var in enumerate(self.variable_list))
+
         # Compute overlaps for each word
         # For any pair of variables v1, v2, their overlap is either:
         #    None, if the two variables do not overlap; or
         #    (i, j), where v1's ith character overlaps v2's jth character
-        self.overlaps = dict()
-        for v1 in self.variables:
-            for v2 in self.variables:
-                if v1 == v2:
-                    continue
-                cells1 = v1.cells
-                cells2 = v2.cells
-                intersection = set(cells1).intersection(cells2)
-                if not intersection:
-                    self.overlaps[v1, v2] = None
-                else:
-                    intersection = intersection.pop()
-                    self.overlaps[v1, v2] = (
-                        cells1.index(intersection),
-                        cells2.index(intersection)
-                    )
+        # Only overlapping pairs are stored; other pairs look up as None.
+        # A cell is shared by at most one across and one down variable.
+        self.overlaps = Overlaps()
+        cells = dict()
+        for var in self.variable_list:
+            for k, cell in enumerate(var.cells):
+                cells.setdefault(cell, []).append((var, k))
+        for sharing in cells.values():
+            if len(sharing) == 2:
+                (v1, k1), (v2, k2) = sharing
+                self.overlaps[v1, v2] = (k1, k2)
+                self.overlaps[v2, v1] = (k2, k1)
+
+        # Adjacency lists: `arcs[var]` holds `(neighbor, i, j)` for each
+        # overlap of `var`, with neighbors in reading order
+        arcs = dict((var, []) for var in self.variable_list)
+        for (v1, v2), (i, j) in self.overlaps.items():
+            arcs[v1].append((v2, i, j))
+        self.arcs = dict(
+            (var, tuple(sorted(arcs[var], key=lambda arc: ids[arc[0]])))
+            for var in self.variable_list
+        )
+        self.neighbor_sets = {
+            var: frozenset(neighbor for neighbor, _, _ in self.arcs[var])
+            for var in self.variable_list
+        }
 
     def neighbors(self, var):
         """Given a variable, return set of overlapping variables."""
-        return set(
-            v for v in self.variables
-            if v != var and self.overlaps[v, var]
+        return self.neighbor_sets[var]
+
+    def letter_index(self, length, i):
+        """Return the map from letters to bitsets of words of `length`
+        with that letter at position `i`."""
+        index = self.index.get(length)
+        return index[i] if index else {}
+
+    def pattern_bits(self, pattern):
+        """Return the bitset of words matching `pattern`, where "?" matches
+        any letter, e.g. "C?O??"."""
+        bits = (1 << len(self.vocabulary.get(len(pattern), []))) - 1
+        for i, letter in enumerate(pattern.upper()):
+            if letter != "?":
+                bits &= self.letter_index(len(pattern), i).get(letter, 0)
+        return bits
+
+    def match(self, pattern):
+        """Return the set of words matching `pattern`."""
+        words = self.vocabulary.get(len(pattern), [])
+        return set(words[k] for k in bit_indices(self.pattern_bits(pattern)))
+
+
+def letter_masks(words, length):
+    """
+    Return a list with, for each position up to `length`, a dictionary
+    mapping letters to bitsets of the indices of the words in `words`
+    with that letter at that position.
+    """
+    bitmaps = [dict() for _ in range(length)]
+    for k, word in enumerate(words):
+        for i, letter in enumerate(word):
+            bitmap = bitmaps[i].get(letter)
+            if bitmap is None:
+                bitmap = bitmaps[i][letter] = bytearray((len(words) + 7) // 8)
+            bitmap[k >> 3] |= 1 << (k & 7)
+    return [
+        dict(
+            (letter, int.from_bytes(bitmap, "little"))
+            for letter, bitmap in position.items()
         )
+        for position in bitmaps
+    ]
+
+
+def bit_indices(bits):
+    """
+    Yield the index of each set bit in `bits`, lowest first.
+    """
+    digits = bin(bits)[:1:-1]
+    k = digits.find("1")
+    while k != -1:
+        yield k
+        k = digits.find("1", k + 1)
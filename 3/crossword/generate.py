@@ -1,21 +1,129 @@
+import functools
+import heapq
+import html
+import itertools
+import os
+import random
+import statistics
 import sys
 import math
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import Event
 
 from crossword import *
 
+# Most values `order_domain_values` ranks by least constraining value;
+# None ranks the whole domain
+LCV_LIMIT = None
+
+# Stale variable queue entries allowed per variable before it is rebuilt
+QUEUE_SLACK = 4
+
+# Node limit of a portfolio search's first attempt, and the factor by which
+# it grows on every restart
+RESTART_NODES = 100
+RESTART_GROWTH = 2
+
+# Image layout in pixels, and the font letters are drawn in
+CELL_SIZE = 100
+CELL_BORDER = 2
+FONT = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "assets", "fonts", "OpenSans-Regular.ttf"
+)
+FONT_SIZE = 80
+
+# Set by a portfolio worker once it has a solution, so the others stop
+STOP = None
+
+
+class SearchLimit(Exception):
+    """Raised when a search expands more nodes than its limit allows."""
+
 
 class CrosswordCreator():
 
-    def __init__(self, crossword):
+    def __init__(self, crossword, seed=None, limit=None):
         """
         Create new CSP crossword generate.
+
+        With a `seed`, ties between variables and between values are broken
+        at random instead of in reading and vocabulary order. With a
+        `limit`, the search raises SearchLimit after that many nodes.
         """
         self.crossword = crossword
+        self.limit = limit
+
+        # Tie-breaking rank of each variable
+        self.random = random.Random(seed) if seed is not None else None
+        ranks = list(range(len(self.crossword.variable_list)))
+        if self.random:
+            self.random.shuffle(ranks)
+        self.rank = dict(zip(self.crossword.variable_list, ranks))
+
+        # A domain is a bitset over the crossword's words of its variable's
+        # length, where bit k stands for `vocabulary[length][k]`
         self.domains = {
-            var: self.crossword.words.copy()
+            var: self.crossword.pattern_bits("?" * var.length)
             for var in self.crossword.variables
         }
 
+        # Undo trail of `(variable, previous domain)` pairs, appended to
+        # whenever a domain shrinks so that backtracking can restore it
+        self.trail = []
+
+        # Words used by the current partial assignment, and counts of the
+        # search nodes expanded, values undone and calls to `revise`
+        self.used = set()
+        self.nodes = 0
+        self.backtracks = 0
+        self.revisions = 0
+
+        # Heap of `(domain size, -degree, rank, variable)` entries for choosing
+        # the next variable. An entry is pushed whenever a domain changes or
+        # a variable is unassigned, and stale ones are skipped when popped.
+        self.queue = []
+        for var in self.crossword.variables:
+            self.schedule(var)
+
+    def domain_words(self, var):
+        """
+        Return the list of words in the domain of `var`.
+        """
+        words = self.crossword.vocabulary.get(var.length, [])
+        return [words[k] for k in bit_indices(self.domains[var])]
+
+    def restrict(self, var, domain):
+        """
+        Replace the domain of `var` with `domain`, recording the old
+        domain on the undo trail.
+        """
+        self.trail.append((var, self.domains[var]))
+        self.domains[var] = domain
+        self.schedule(var)
+
+    def undo(self, mark):
+        """
+        Restore every domain changed since the trail had length `mark`.
+        """
+        while len(self.trail) > mark:
+            var, domain = self.trail.pop()
+            self.domains[var] = domain
+            self.schedule(var)
+
+    def schedule(self, var):
+        """
+        Push `var` onto the variable queue with its current domain size.
+        """
+        heapq.heappush(self.queue, (
+            self.domains[var].bit_count(),
+            -len(self.crossword.neighbors(var)),
+            self.rank[var],
+            var
+        ))
+
     def letter_grid(self, assignment):
         """
         Return 2D array representing a given assignment.
@@ -36,55 +144,14 @@ class CrosswordCreator():
         """
         Print crossword assignment to the terminal.
         """
-        letters = self.letter_grid(assignment)
-        for i in range(self.crossword.height):
-            for j in range(self.crossword.width):
-                if self.crossword.structure[i][j]:
-                    print(letters[i][j] or " ", end="")
-                else:
-                    print("█", end="")
-            print()
+        print(render_text(self.crossword.structure, self.letter_grid(assignment)))
 
     def save(self, assignment, filename):
         """
-        Save crossword assignment to an image file.
+        Save crossword assignment to an image file, or to an SVG or text
+        file if `filename` ends in ".svg" or ".txt".
         """
-        from PIL import Image, ImageDraw, ImageFont
-        cell_size = 100
-        cell_border = 2
-        interior_size = cell_size - 2 * cell_border
-        letters = self.letter_grid(assignment)
-
-        # Create a blank canvas
-        img = Image.new(
-            "RGBA",
-            (self.crossword.width * cell_size,
-             self.crossword.height * cell_size),
-            "black"
-        )
-        font = ImageFont.truetype("assets/fonts/OpenSans-Regular.ttf", 80)
-        draw = ImageDraw.Draw(img)
-
-        for i in range(self.crossword.height):
-            for j in range(self.crossword.width):
-
-                rect = [
-                    (j * cell_size + cell_border,
-                     i * cell_size + cell_border),
-                    ((j + 1) * cell_size - cell_border,
-                     (i + 1) * cell_size - cell_border)
-                ]
-                if self.crossword.structure[i][j]:
-                    draw.rectangle(rect, fill="white")
-                    if letters[i][j]:
-                        w, h = draw.textsize(letters[i][j], font=font)
-                        draw.text(
-                            (rect[0][0] + ((interior_size - w) / 2),
-                             rect[0][1] + ((interior_size - h) / 2) - 10),
-                            letters[i][j], fill="black", font=font
-                        )
-
-        img.save(filename)
+        render(self.crossword.structure, self.letter_grid(assignment), filename)
 
     def solve(self):
         # Enforce node and arc consistency, and then solve the CSP.
@@ -96,13 +163,12 @@ class CrosswordCreator():
         # Update `self.domains` such that each variable is node-consistent.
         # (Remove any values that are inconsistent with a variable's unary
         # constraints; in this case, the length of the word.)
-        for word in self.domains:
-            length = word.length
-            newDomain = set()
-            for var in self.domains[word]:
-                if len(var) == length:
-                    newDomain.add(var)
-            self.domains[word] = newDomain.copy()
+        # Domains only ever index words of the variable's length, so this
+        # just clears any bits beyond that vocabulary.
+        for var in self.domains:
+            domain = self.domains[var] & self.crossword.pattern_bits("?" * var.length)
+            if domain != self.domains[var]:
+                self.restrict(var, domain)
 
     def revise(self, x, y):
         # Make variable `x` arc consistent with variable `y`.
@@ -111,17 +177,24 @@ class CrosswordCreator():
 
         # Return True if a revision was made to the domain of `x`; return
         # False if no revision was made.
-        revised = False
-        newDomain = self.domains[x].copy()
-        overlap = self.crossword.overlaps[x, y]
-        yletters = set()
-        for yvar in self.domains[y]:
-            yletters.add(yvar[overlap[1]])
-        for xvar in newDomain:
-            if xvar[overlap[0]] not in yletters:
-                self.domains[x].remove(xvar)
-                revised = True
-        return revised
+        self.revisions += 1
+        i, j = self.crossword.overlaps[x, y]
+        xletters = self.crossword.letter_index(x.length, i)
+        yletters = self.crossword.letter_index(y.length, j)
+        ydomain = self.domains[y]
+
+        # Keep the words of `x` whose letter at the overlap is one that some
+        # word of `y` still has there
+        supported = 0
+        for letter, words in yletters.items():
+            if ydomain & words:
+                supported |= xletters.get(letter, 0)
+
+        revised = self.domains[x] & supported
+        if revised == self.domains[x]:
+            return False
+        self.restrict(x, revised)
+        return True
 
     def ac3(self, arcs=None):
         # Update `self.domains` such that each variable is arc consistent.
@@ -130,23 +203,26 @@ class CrosswordCreator():
 
         # Return True if arc consistency is enforced and no domains are empty;
         # return False if one or more domains end up empty.
-        arcscopy = []
-        if arcs == None:
-            for x in self.domains:
-                for y in self.domains:
-                    if (x != y) and (y in self.crossword.neighbors(x)):
-                        arcscopy.append((x, y))
-
-        while len(arcscopy) != 0:
-            arc = arcscopy.pop(0)
-            if self.revise(arc[0], arc[1]):
-                if self.domains[arc[0]] == 0:
+        if arcs is None:
+            arcs = [
+                (x, y)
+                for x in self.domains
+                for y in self.crossword.neighbors(x)
+            ]
+        queue = deque(arcs)
+        queued = set(queue)
+
+        while queue:
+            arc = queue.popleft()
+            queued.discard(arc)
+            x, y = arc
+            if self.revise(x, y):
+                if self.domains[x] == 0:
                     return False
-                else:
-                    neighbors = self.crossword.neighbors(arc[0])
-                    neighbors.remove(arc[1])
-                    for z in neighbors:
-                        arcscopy.append((z, arc[0]))
+                for z in self.crossword.neighbors(x):
+                    if z != y and (z, x) not in queued:
+                        queue.append((z, x))
+                        queued.add((z, x))
         return True
 
     def assignment_complete(self, assignment):
@@ -181,31 +257,51 @@ class CrosswordCreator():
                         return False
         return True
 
-    def order_domain_values(self, var, assignment):
+    def consistent_value(self, var, value, assignment):
+        # Return True if assigning `value` to `var` keeps a consistent
+        # `assignment` consistent, checking only `var` against its assigned
+        # neighbors and the words already used.
+        if value in self.used or var.length != len(value):
+            return False
+        for neighbor, i, j in self.crossword.arcs[var]:
+            if neighbor in assignment and value[i] != assignment[neighbor][j]:
+                return False
+        return True
+
+    def order_domain_values(self, var, assignment, limit=LCV_LIMIT):
         # Return a list of values in the domain of `var`, in order by
         # the number of values they rule out for neighboring variables.
         # The first value in the list, for example, should be the one
         # that rules out the fewest values among the neighbors of `var`.
-        orderedlist = [[word, 0] for word in list(self.domains[var])]
-        includedNVars = []
-        for x in self.crossword.variables:
-            if x not in list(assignment.keys()) and x in list(self.crossword.neighbors(var)):
-                includedNVars.append(x)
-        checklist = [[list(self.domains[Nvar]), list(self.crossword.overlaps[var, Nvar])] for Nvar in includedNVars]
-        for variableword in orderedlist:
-            removecount = 0
-            for Nvar in checklist:
-                words = Nvar[0]
-                overlap = Nvar[1]
-                for word in words:
-                    if variableword[0][overlap[0]] != word[overlap[1]]:
-                        removecount += 1
-            variableword[1] = removecount
-        orderedlist = sorted(orderedlist, key=lambda word: word[1])
-        rlist = []
-        for x in orderedlist:
-            rlist.append(x[0])
-        return rlist
+        # A neighbor whose overlap letter differs loses that word, so count
+        # the words of each unassigned neighbor's domain by overlap letter
+        histograms = []
+        for neighbor, i, j in self.crossword.arcs[var]:
+            if neighbor not in assignment:
+                domain = self.domains[neighbor]
+                counts = {
+                    letter: (domain & words).bit_count()
+                    for letter, words in
+                    self.crossword.letter_index(neighbor.length, j).items()
+                }
+                histograms.append((i, domain.bit_count(), counts))
+
+        def ruled_out(word):
+            return sum(
+                size - counts.get(word[i], 0)
+                for i, size, counts in histograms
+            )
+
+        # On large domains only the `limit` best values are ranked; the
+        # rest follow in vocabulary order, or shuffled for a seeded search
+        values = self.domain_words(var)
+        if self.random:
+            self.random.shuffle(values)
+        if limit is not None and len(values) > limit:
+            head = heapq.nsmallest(limit, values, key=ruled_out)
+            ranked = set(head)
+            return head + [value for value in values if value not in ranked]
+        return sorted(values, key=ruled_out)
 
     def select_unassigned_variable(self, assignment):
         # Return an unassigned variable not already part of `assignment`.
@@ -213,22 +309,23 @@ class CrosswordCreator():
         # in its domain. If there is a tie, choose the variable with the highest
         # degree. If there is a tie, any of the tied variables are acceptable
         # return values.
-        variables = []
-        temp = []
-        for x in self.crossword.variables:
-            if x not in list(assignment.keys()):
-                variables.append([x, len(self.domains[x]), len(self.crossword.neighbors(x))])
-        variables = sorted(variables, key=lambda variable: variable[1])
-        minDomains = variables[0][1]
-        while len(variables) != 0:
-            if variables[0][1] == minDomains:
-                temp.append(variables[0])
-            variables.pop(0)
-        variables = temp.copy()
-        if len(variables) == 1:
-            return variables[0][0]
-        variables = sorted(variables, key=lambda variable: variable[2], reverse=True)
-        return variables[0][0]
+        # Drop stale entries left behind by lazy deletion once they
+        # outnumber the variables
+        queue = self.queue
+        if len(queue) > QUEUE_SLACK * len(self.domains):
+            self.queue = queue = []
+            for var in self.domains:
+                if var not in assignment:
+                    self.schedule(var)
+
+        # Discard entries for assigned variables and for domains that have
+        # changed since, leaving the best current entry on top
+        while queue:
+            size, _, _, var = queue[0]
+            if var not in assignment and self.domains[var].bit_count() == size:
+                return var
+            heapq.heappop(queue)
+        return None
 
     def backtrack(self, assignment):
         # Using Backtracking Search, take as input a partial assignment for the
@@ -237,44 +334,373 @@ class CrosswordCreator():
         # `assignment` is a mapping from variables (keys) to words (values).
 
         # If no assignment is possible, return None.
+        return next(self.solutions(assignment), None)
+
+    def solutions(self, assignment, share=None):
+        """
+        Yield every complete assignment extending `assignment`.
+
+        If `share` is `(k, n)`, only every nth value of the first variable
+        is tried, starting from the kth, so that n searches split the
+        solutions between them.
+        """
+        # Give up past the node limit, or once another portfolio worker
+        # has found a solution
+        self.nodes += 1
+        if self.limit is not None and self.nodes > self.limit:
+            raise SearchLimit()
+        if STOP is not None and STOP.is_set():
+            raise SearchLimit()
         if self.assignment_complete(assignment):
-            return assignment
+            yield dict(assignment)
+            return
         var = self.select_unassigned_variable(assignment)
-        for value in self.order_domain_values(var, assignment):
-            assignmentcopy = assignment.copy()
-            assignmentcopy[var] = value
-            if self.consistent(assignmentcopy):
+        values = self.order_domain_values(var, assignment)
+        if share is not None:
+            values = values[share[0]::share[1]]
+        for value in values:
+            if self.consistent_value(var, value, assignment):
                 assignment[var] = value
-                result = self.backtrack(assignment)
-                if result != None:
-                    return result
+                self.used.add(value)
+
+                # Maintain arc consistency: shrink the domain of `var` to
+                # `value` and propagate into its unassigned neighbors,
+                # undoing every pruned domain once the branch is exhausted
+                mark = len(self.trail)
+                self.restrict(var, 1 << self.crossword.positions[value])
+                arcs = [
+                    (z, var) for z in self.crossword.neighbors(var)
+                    if z not in assignment
+                ]
+                if self.ac3(arcs):
+                    yield from self.solutions(assignment)
+                self.undo(mark)
+                self.used.remove(value)
                 assignment.pop(var)
-        return None
+                self.schedule(var)
+                self.backtracks += 1
+
+
+def render(structure, letters, filename):
+    """
+    Write the grid of `letters` over `structure` to `filename`, choosing
+    the format from its extension.
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension in [".svg", ".txt"]:
+        contents = (
+            render_svg(structure, letters) if extension == ".svg"
+            else render_text(structure, letters) + "\n"
+        )
+        with open(filename, "w", encoding="utf-8") as f:
+            f.write(contents)
+    else:
+        render_image(structure, letters).save(filename)
+
+
+def render_text(structure, letters):
+    """
+    Return the grid of `letters` as text, with blocks for blocked cells.
+    """
+    return "\n".join(
+        "".join(
+            (letter or " ") if open_cell else "█"
+            for open_cell, letter in zip(cells, row)
+        )
+        for cells, row in zip(structure, letters)
+    )
+
+
+def render_svg(structure, letters):
+    """
+    Return the grid of `letters` as an SVG document.
+    """
+    height = len(structure) * CELL_SIZE
+    width = len(structure[0]) * CELL_SIZE if structure else 0
+    interior = CELL_SIZE - 2 * CELL_BORDER
+    lines = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" '
+        f'width="{width}" height="{height}" viewBox="0 0 {width} {height}">',
+        f'<rect width="{width}" height="{height}" fill="black"/>',
+        f'<g font-family="Open Sans, sans-serif" font-size="{FONT_SIZE}" '
+        f'text-anchor="middle" dominant-baseline="central">'
+    ]
+    for i, (cells, row) in enumerate(zip(structure, letters)):
+        for j, (open_cell, letter) in enumerate(zip(cells, row)):
+            if not open_cell:
+                continue
+            x = j * CELL_SIZE + CELL_BORDER
+            y = i * CELL_SIZE + CELL_BORDER
+            lines.append(
+                f'<rect x="{x}" y="{y}" width="{interior}" '
+                f'height="{interior}" fill="white"/>'
+            )
+            if letter:
+                lines.append(
+                    f'<text x="{x + interior / 2:g}" y="{y + interior / 2:g}">'
+                    f'{html.escape(letter)}</text>'
+                )
+    lines.append("</g>")
+    lines.append("</svg>")
+    return "\n".join(lines) + "\n"
+
+
+@functools.lru_cache(maxsize=None)
+def glyph(letter):
+    """
+    Return the image of a white cell interior with `letter` centered on
+    it, rendering each letter only once per process.
+    """
+    from PIL import Image, ImageDraw
+    interior = CELL_SIZE - 2 * CELL_BORDER
+    tile = Image.new("RGBA", (interior, interior), "white")
+    if letter:
+        font = load_font()
+        left, top, right, bottom = font.getbbox(letter)
+        ImageDraw.Draw(tile).text(
+            ((interior - (right - left)) / 2 - left,
+             (interior - (bottom - top)) / 2 - top),
+            letter, fill="black", font=font
+        )
+    return tile
+
+
+@functools.lru_cache(maxsize=None)
+def load_font():
+    """
+    Return the font letters are drawn in, loading it only once per process.
+    """
+    from PIL import ImageFont
+    return ImageFont.truetype(FONT, FONT_SIZE)
+
+
+def render_image(structure, letters):
+    """
+    Return the grid of `letters` as an image, pasting in a cached glyph
+    for every open cell.
+    """
+    from PIL import Image
+    height = len(structure)
+    width = len(structure[0]) if structure else 0
+    img = Image.new("RGBA", (width * CELL_SIZE, height * CELL_SIZE), "black")
+    for i, (cells, row) in enumerate(zip(structure, letters)):
+        for j, (open_cell, letter) in enumerate(zip(cells, row)):
+            if open_cell:
+                img.paste(glyph(letter), (
+                    j * CELL_SIZE + CELL_BORDER,
+                    i * CELL_SIZE + CELL_BORDER
+                ))
+    return img
+
+
+def export(creator, assignments, filenames, workers=None):
+    """
+    Save each of `assignments` to the matching one of `filenames` on a pool
+    of `workers` processes, sending each only the structure and letters.
+    """
+    structure = creator.crossword.structure
+    grids = [creator.letter_grid(assignment) for assignment in assignments]
+    workers = workers or os.cpu_count()
+    with ProcessPoolExecutor(workers) as executor:
+        list(executor.map(
+            render, [structure] * len(grids), grids, filenames,
+            chunksize=max(1, len(grids) // (workers * 4))
+        ))
+
+
+@functools.lru_cache(maxsize=None)
+def load(structure, words):
+    """
+    Return the crossword for `structure` and `words`, loading it only once
+    per process.
+    """
+    return Crossword(structure, words)
+
+
+def start_worker(stop):
+    """
+    Share the portfolio's stop event with a worker process.
+    """
+    global STOP
+    STOP = stop
+
+
+def restart_search(structure, words, seed, race=True):
+    """
+    Search for a solution with randomized restarts, starting from a node
+    limit of RESTART_NODES and growing it by RESTART_GROWTH each time.
+
+    If `race` is true, stop early, even mid-attempt, once another worker
+    has found a solution.
+    Return `(assignment, seconds, nodes, restarts)`, where `assignment` is
+    None if there is no solution or the search was stopped.
+    """
+    crossword = load(structure, words)
+    start = time.perf_counter()
+    seeds = random.Random(seed)
+    limit = RESTART_NODES
+    nodes = 0
+    restarts = 0
+    assignment = None
+    while not (race and STOP.is_set()):
+        creator = CrosswordCreator(crossword, seeds.randrange(2 ** 32), limit)
+        try:
+            assignment = creator.solve()
+        except SearchLimit:
+            nodes += creator.nodes
+            limit *= RESTART_GROWTH
+            restarts += 1
+            continue
+        nodes += creator.nodes
+        if race:
+            STOP.set()
+        break
+    return assignment, time.perf_counter() - start, nodes, restarts
+
+
+def enumerate_share(structure, words, share, count):
+    """
+    Return up to `count` solutions from share `(k, n)` of the search space.
+    """
+    creator = CrosswordCreator(load(structure, words))
+    creator.enforce_node_consistency()
+    if not creator.ac3():
+        return []
+    return list(itertools.islice(creator.solutions(dict(), share), count))
+
+
+def portfolio(structure, words, workers=None, seed=0):
+    """
+    Race `workers` differently seeded restart searches on a process pool
+    and return the first solution found, or None if there is none, along
+    with the time it took.
+    """
+    workers = workers or os.cpu_count()
+    start = time.perf_counter()
+    with ProcessPoolExecutor(
+        workers, initializer=start_worker, initargs=(Event(),)
+    ) as executor:
+        pending = {
+            executor.submit(restart_search, structure, words, seed + k)
+            for k in range(workers)
+        }
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                assignment = future.result()[0]
+                if assignment is not None:
+                    return assignment, time.perf_counter() - start
+    return None, time.perf_counter() - start
+
+
+def enumerate_solutions(structure, words, count, workers=None):
+    """
+    Return up to `count` distinct solutions, splitting the search space
+    between `workers` processes.
+    """
+    workers = workers or os.cpu_count()
+    with ProcessPoolExecutor(workers) as executor:
+        shares = executor.map(
+            enumerate_share,
+            [structure] * workers, [words] * workers,
+            [(k, workers) for k in range(workers)], [count] * workers
+        )
+        return list(itertools.islice(itertools.chain(*shares), count))
+
+
+def time_to_solution(structure, words, trials, workers=None, seed=0):
+    """
+    Run `trials` independently seeded restart searches on a process pool
+    and return their `(seconds, nodes, restarts)` in seed order.
+    """
+    with ProcessPoolExecutor(workers or os.cpu_count()) as executor:
+        runs = executor.map(
+            restart_search,
+            [structure] * trials, [words] * trials,
+            range(seed, seed + trials), [False] * trials
+        )
+        return [run[1:] for run in runs]
+
+
+USAGE = (
+    "Usage: python generate.py structure words [output] "
+    "[--portfolio] [--solutions N] [--trials N] [--workers N] [--seed N]"
+)
 
 
 def main():
 
+    # Separate options from positional arguments
+    arguments = []
+    options = {"--solutions": None, "--trials": None, "--workers": None, "--seed": 0}
+    race = False
+    argv = iter(sys.argv[1:])
+    for arg in argv:
+        if arg == "--portfolio":
+            race = True
+        elif arg in options:
+            try:
+                options[arg] = int(next(argv))
+            except (StopIteration, ValueError):
+                sys.exit(USAGE)
+        elif arg.startswith("--"):
+            sys.exit(USAGE)
+        else:
+            arguments.append(arg)
+
     # Check usage
-    if len(sys.argv) not in [3, 4]:
-        sys.exit("Usage: python generate.py structure words [output]")
+    if len(arguments) not in [2, 3]:
+        sys.exit(USAGE)
 
     # Parse command-line arguments
-    structure = sys.argv[1]
-    words = sys.argv[2]
-    output = sys.argv[3] if len(sys.argv) == 4 else None
+    structure = arguments[0]
+    words = arguments[1]
+    output = arguments[2] if len(arguments) == 3 else None
+    workers = options["--workers"]
+    seed = options["--seed"]
+
+    # Report how long seeded restart searches take to find a solution
+    if options["--trials"] is not None:
+        if options["--trials"] < 2:
+            sys.exit("At least 2 trials are needed for a distribution")
+        runs = time_to_solution(structure, words, options["--trials"], workers, seed)
+        seconds = sorted(run[0] for run in runs)
+        quantiles = statistics.quantiles(seconds, n=10, method="inclusive")
+        print(f"{len(runs)} trials, "
+              f"{statistics.mean(run[1] for run in runs):.0f} nodes and "
+              f"{statistics.mean(run[2] for run in runs):.1f} restarts on average")
+        print(f"Time to first solution: min {seconds[0]:.3f}s, "
+              f"median {quantiles[4]:.3f}s, 90th percentile {quantiles[8]:.3f}s, "
+              f"max {seconds[-1]:.3f}s")
+        return
 
     # Generate crossword
-    crossword = Crossword(structure, words)
+    crossword = load(structure, words)
     creator = CrosswordCreator(crossword)
-    assignment = creator.solve()
+    if options["--solutions"]:
+        assignments = enumerate_solutions(structure, words, options["--solutions"], workers)
+    elif race:
+        assignment, elapsed = portfolio(structure, words, workers, seed)
+        assignments = [assignment] if assignment is not None else []
+        if assignments:
+            print(f"Found in {elapsed:.3f}s")
+    else:
+        assignment = creator.solve()
+        assignments = [assignment] if assignment is not None else []
 
     # Print result
-    if assignment is None:
+    if not assignments:
         print("No solution.")
-    else:
+    for k, assignment in enumerate(assignments):
+        if k:
+            print()
         creator.print(assignment)
-        if output:
-            creator.save(assignment, output)
+    if output and len(assignments) == 1:
+        creator.save(assignments[0], output)
+    elif output and assignments:
+        root, extension = os.path.splitext(output)
+        filenames = [f"{root}{k + 1}{extension}" for k in range(len(assignments))]
+        export(creator, assignments, filenames, workers)
 
 
 if __name__ == "__main__":
@@ -2,6 +2,11 @@ import math
 import random
 import time
 
+import numpy as np
+
+# Number of training games simulated side by side
+BATCH = 1000
+
 
 class Nim():
 
@@ -185,62 +190,119 @@ class NimAI():
         return highest_q_action
 
 
-def train(n):
+def state_space(initial):
     """
-    Train an AI by playing `n` games against itself.
+    Number every pile configuration reachable from `initial` and every
+    action, returning a dict of NumPy tables:
+        - `piles`: the piles of each state
+        - `actions`: the `(i, j)` action of each action index
+        - `valid`: whether each action is available in each state
+        - `successor`: the state each action leads to, where valid
+        - `start`: the state of `initial`
+    State 0 is the empty board.
     """
+    sizes = [pile + 1 for pile in initial]
+    strides = np.cumprod([1] + sizes[:-1])
+    piles = np.stack(np.unravel_index(
+        np.arange(np.prod(sizes)), sizes, order="F"
+    ), axis=1)
+    actions = [
+        (i, j) for i, pile in enumerate(initial) for j in range(1, pile + 1)
+    ]
+    pile, count = np.array(actions).T
+    valid = piles[:, pile] >= count
+    successor = np.where(
+        valid, np.arange(len(piles))[:, None] - count * strides[pile], 0
+    )
+    return {
+        "piles": piles,
+        "actions": actions,
+        "valid": valid,
+        "successor": successor,
+        "start": int(np.dot(initial, strides))
+    }
+
+
+def train(n, initial=[1, 3, 5, 7], batch=BATCH, alpha=0.5, epsilon=0.1, seed=None):
+    """
+    Train an AI by playing `n` games against itself.
 
-    player = NimAI()
-
-    # Play n games
-    for i in range(n):
-        print(f"Playing training game {i + 1}")
-        game = Nim()
-
-        # Keep track of last move made by either player
-        last = {
-            0: {"state": None, "action": None},
-            1: {"state": None, "action": None}
-        }
-
-        # Game loop
-        while True:
-
-            # Keep track of current state and action
-            state = game.piles.copy()
-            action = player.choose_action(game.piles)
-
-            # Keep track of last state and action
-            last[game.player]["state"] = state
-            last[game.player]["action"] = action
-
-            # Make move
-            game.move(action)
-            new_state = game.piles.copy()
-
-            # When game is over, update Q values with rewards
-            if game.winner is not None:
-                player.update(state, action, new_state, -1)
-                player.update(
-                    last[game.player]["state"],
-                    last[game.player]["action"],
-                    new_state,
-                    1
-                )
-                break
-
-            # If game is continuing, no rewards yet
-            elif last[game.player]["state"] is not None:
-                player.update(
-                    last[game.player]["state"],
-                    last[game.player]["action"],
-                    new_state,
-                    0
-                )
+    Games are simulated `batch` at a time on a dense NumPy Q-table indexed
+    by state and action number, with epsilon-greedy moves. Updates that
+    land on the same `(state, action)` pair in the same move are averaged
+    into a single update. The returned NimAI holds the Q-value of every
+    pair that was visited.
+    """
+    space = state_space(initial)
+    valid = space["valid"]
+    successor = space["successor"]
+    states, actions = valid.shape
+    q = np.zeros((states, actions))
+    visited = np.zeros((states, actions), dtype=bool)
+    rng = np.random.default_rng(seed)
+
+    for played in range(0, n, batch):
+        games = min(batch, n - played)
+        state = np.full(games, space["start"])
+        player = np.zeros(games, dtype=np.int64)
+
+        # Last state and action of each player in each game, -1 if none
+        last_state = np.full((games, 2), -1)
+        last_action = np.full((games, 2), -1)
+
+        playing = np.arange(games)
+        while playing.size:
+            current = state[playing]
+            mover = player[playing]
+
+            # Choose the best action, or a random one with probability epsilon
+            options = valid[current]
+            action = np.where(options, q[current], -np.inf).argmax(axis=1)
+            explore = rng.random(len(playing)) < epsilon
+            action[explore] = (
+                rng.random((explore.sum(), actions)) * options[explore]
+            ).argmax(axis=1)
+            new_state = successor[current, action]
+            last_state[playing, mover] = current
+            last_action[playing, mover] = action
+
+            # The player who empties the board loses, and the other wins;
+            # otherwise the other player's last move earns nothing yet
+            over = new_state == 0
+            other = 1 - mover
+            earlier = last_state[playing, other] >= 0
+            update_states = np.concatenate(
+                [current[over], last_state[playing, other][earlier]])
+            update_actions = np.concatenate(
+                [action[over], last_action[playing, other][earlier]])
+            rewards = np.concatenate(
+                [np.full(over.sum(), -1.0), over[earlier].astype(float)])
+            futures = np.concatenate(
+                [new_state[over], new_state[earlier]])
+
+            # Q(s, a) <- Q(s, a) + alpha * (reward + max Q(s', a') - Q(s, a))
+            best = np.where(valid, q, -np.inf).max(axis=1)
+            best[~valid.any(axis=1)] = 0
+            pairs = update_states * actions + update_actions
+            totals = np.bincount(
+                pairs, weights=rewards + best[futures], minlength=q.size)
+            counts = np.bincount(pairs, minlength=q.size)
+            seen = counts > 0
+            flat = q.reshape(-1)
+            flat[seen] += alpha * (totals[seen] / counts[seen] - flat[seen])
+            visited.reshape(-1)[seen] = True
+
+            state[playing] = new_state
+            player[playing] = other
+            playing = playing[~over]
 
     print("Done training")
 
     # Return the trained AI
+    player = NimAI(alpha, epsilon)
+    piles = space["piles"].tolist()
+    for s, a in zip(*np.nonzero(visited)):
+        player.q[tuple(piles[s]), space["actions"][a]] = float(q[s, a])
     return player
 
 